@@ -7,15 +7,81 @@ __author__ = "Martin Contreras"
 __email__ = "martincontrerasur@gmail.com"
 
 from .redshift_utils import (
+    AsyncRedshiftClient,
+    CopyOptions,
+    Instrumentation,
+    LoadStats,
+    LoggingInstrumentation,
+    OpenTelemetryInstrumentation,
+    OperationResult,
+    QueryCache,
+    RedshiftClient,
+    S3Verification,
+    StatementHandle,
+    StatementWait,
+    UnloadOptions,
+    UnloadPlan,
+    get_default_client,
+    set_default_client,
     unload_redshift,
+    read_redshift,
+    fetch_redshift,
+    scan_redshift,
+    iter_redshift_batches,
     copy_to_redshift,
     copy_s3_to_redshift,
-    verify_s3_files
+    verify_s3_files,
+    submit_unload,
+    submit_copy,
+    submit_copy_s3,
+    as_completed,
+    wait_statements,
+    unload_redshift_async,
+    read_redshift_async,
+    copy_to_redshift_async,
+    copy_s3_to_redshift_async,
+)
+from .redshift_local import (
+    LocalRedshift,
+    LocalRedshiftData,
+    LocalS3,
 )
 
 __all__ = [
+    "AsyncRedshiftClient",
+    "CopyOptions",
+    "Instrumentation",
+    "LoadStats",
+    "LoggingInstrumentation",
+    "OpenTelemetryInstrumentation",
+    "OperationResult",
+    "QueryCache",
+    "RedshiftClient",
+    "S3Verification",
+    "StatementHandle",
+    "StatementWait",
+    "UnloadOptions",
+    "UnloadPlan",
+    "get_default_client",
+    "set_default_client",
     "unload_redshift",
+    "read_redshift",
+    "fetch_redshift",
+    "scan_redshift",
+    "iter_redshift_batches",
     "copy_to_redshift",
     "copy_s3_to_redshift",
     "verify_s3_files",
+    "submit_unload",
+    "submit_copy",
+    "submit_copy_s3",
+    "as_completed",
+    "wait_statements",
+    "unload_redshift_async",
+    "read_redshift_async",
+    "copy_to_redshift_async",
+    "copy_s3_to_redshift_async",
+    "LocalRedshift",
+    "LocalRedshiftData",
+    "LocalS3",
 ]
\ No newline at end of file
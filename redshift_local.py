@@ -0,0 +1,1248 @@
+"""
+In-process stand-ins for the Redshift Data API and S3, for end-to-end tests and
+benchmarks without AWS.
+
+``LocalRedshift`` bundles an in-memory S3 (``LocalS3``) and a Data API
+(``LocalRedshiftData``) whose engine runs the statements redshift_utils
+generates on polars: CREATE/DROP/ALTER TABLE, DELETE, TRUNCATE, INSERT, MERGE,
+SELECT, EXPLAIN and the COPY and UNLOAD statements, which read and write real
+files in the local S3. Statements run asynchronously on a thread pool and move
+through SUBMITTED, STARTED and FINISHED/FAILED/ABORTED like on a cluster, so
+polling, cancellation, timings and load statistics all take their real paths.
+
+Example:
+    local = LocalRedshift()
+    client = local.client()
+    client.copy(df, "events", "analytics", "bucket", "dev", "local", "admin", "role")
+    client.unload("SELECT * FROM analytics.events", "s3://bucket/out/", "dev", "local", "admin", "role")
+"""
+
+import bz2
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+import polars as pl
+from botocore.exceptions import ClientError
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for ZSTD files
+    zstandard = None
+
+# Slices the local cluster reports in STV_SLICES and spreads UNLOAD files and COPY loads over
+DEFAULT_LOCAL_SLICES = 4
+# Statements the local cluster runs at once; transactions still commit one at a time
+DEFAULT_LOCAL_CONCURRENCY = 4
+# Records per GetStatementResult page
+DEFAULT_RESULT_PAGE_ROWS = 1000
+# Keys per ListObjectsV2 page, as in S3
+DEFAULT_LIST_MAX_KEYS = 1000
+
+# UNLOAD writes files of at most this size unless MAXFILESIZE says otherwise
+DEFAULT_UNLOAD_MAX_FILE_MB = 6200
+# Object name UNLOAD ... MANIFEST writes after the destination prefix
+MANIFEST_NAME = "manifest"
+# Partition directory of NULL values, as Redshift and Hive name it
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+RUNNING_STATUSES = ("SUBMITTED", "PICKED", "STARTED")
+
+# Redshift column types of CREATE TABLE and the polars dtype a column is stored as
+COLUMN_TYPES = {
+    "SMALLINT": pl.Int16,
+    "INT2": pl.Int16,
+    "INTEGER": pl.Int32,
+    "INT": pl.Int32,
+    "INT4": pl.Int32,
+    "BIGINT": pl.Int64,
+    "INT8": pl.Int64,
+    "REAL": pl.Float32,
+    "FLOAT4": pl.Float32,
+    "DOUBLE PRECISION": pl.Float64,
+    "FLOAT8": pl.Float64,
+    "FLOAT": pl.Float64,
+    "BOOLEAN": pl.Boolean,
+    "BOOL": pl.Boolean,
+    "DATE": pl.Date,
+    "TIME": pl.Time,
+    "TIME WITHOUT TIME ZONE": pl.Time,
+    "TIMESTAMP": pl.Datetime("us"),
+    "TIMESTAMP WITHOUT TIME ZONE": pl.Datetime("us"),
+    "TIMESTAMPTZ": pl.Datetime("us", "UTC"),
+    "TIMESTAMP WITH TIME ZONE": pl.Datetime("us", "UTC"),
+}
+
+# File formats and compressions UNLOAD and COPY understand
+FILE_FORMATS = ("csv", "json", "parquet", "avro", "orc")
+COMPRESSIONS = {"gzip": ".gz", "bzip2": ".bz2", "zstd": ".zst"}
+
+# Words that end a column's type in a CREATE TABLE column definition
+COLUMN_ATTRIBUTES = r"ENCODE|NOT\s+NULL|NULL|DEFAULT|PRIMARY\s+KEY|UNIQUE|REFERENCES|DISTKEY|SORTKEY|IDENTITY|" \
+                    r"GENERATED|COLLATE"
+
+NAME = r'[\w."]+'
+STATEMENTS = [
+    ("unload", r"unload\s*\(\s*'(?P<query>(?:[^']|'')*)'\s*\)\s*to\s*'(?P<destination>[^']+)'(?P<options>.*)"),
+    ("copy", rf"copy\s+(?P<table>{NAME})\s*(?:\((?P<columns>[^)]*)\))?\s*from\s+'(?P<source>[^']+)'(?P<options>.*)"),
+    ("create_like", rf"create\s+(?P<temp>(?:temp|temporary)\s+)?table\s+(?P<if_not_exists>if\s+not\s+exists\s+)?"
+                    rf"(?P<table>{NAME})\s*\(\s*like\s+(?P<like>{NAME})\s*\)"),
+    ("create_as", rf"create\s+(?P<temp>(?:temp|temporary)\s+)?table\s+(?P<if_not_exists>if\s+not\s+exists\s+)?"
+                  rf"(?P<table>{NAME})\s+as\s+(?P<query>(?:select|with|\().*)"),
+    ("create", rf"create\s+(?P<temp>(?:temp|temporary)\s+)?table\s+(?P<if_not_exists>if\s+not\s+exists\s+)?"
+               rf"(?P<table>{NAME})\s*(?P<body>\(.*)"),
+    ("drop", r"drop\s+table\s+(?P<if_exists>if\s+exists\s+)?(?P<tables>[\w.\"\s,]+?)(?:\s+(?:cascade|restrict))?"),
+    ("rename", rf"alter\s+table\s+(?P<table>{NAME})\s+rename\s+to\s+(?P<new_name>[\w\"]+)"),
+    ("truncate", rf"truncate\s+(?:table\s+)?(?P<table>{NAME})"),
+    ("delete_using", rf"delete\s+from\s+(?P<table>{NAME})\s+using\s+(?P<source>{NAME})\s+where\s+(?P<condition>.+)"),
+    ("delete", rf"delete\s+(?:from\s+)?(?P<table>{NAME})(?:\s+where\s+(?P<condition>.+))?"),
+    ("insert", rf"insert\s+into\s+(?P<table>{NAME})\s*(?:\((?P<columns>[^)]*)\))?\s*(?P<query>(?:select|with|\().*)"),
+    ("merge", rf"merge\s+into\s+(?P<table>{NAME})\s+using\s+(?P<source>{NAME})\s+on\s+(?P<condition>.+?)"
+              r"\s+remove\s+duplicates"),
+    ("explain", r"explain\s+(?P<query>.+)"),
+    ("query", r"(?P<query>(?:select|with)\b.*)"),
+    ("noop", r"(?:analyze|vacuum|begin|start\s+transaction|commit|end|set|reset|grant|revoke|comment)\b.*"),
+]
+STATEMENT_PATTERNS = [(kind, re.compile(pattern + r"$", re.IGNORECASE | re.DOTALL)) for kind, pattern in STATEMENTS]
+
+
+class _StatementError(Exception):
+    """A statement failed; the message becomes the Data API ``Error``."""
+
+
+class _StatementCancelled(Exception):
+    """A CancelStatement arrived while the statement was running."""
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+def _split_s3_uri(s3_uri: str):
+    """(bucket, key) of an s3:// URI."""
+    if not s3_uri.startswith("s3://"):
+        raise _StatementError(f"Invalid S3 URI: {s3_uri}")
+    bucket, _, key = s3_uri[len("s3://"):].partition("/")
+    return bucket, key
+
+
+def _table_key(name: str) -> str:
+    """Catalog key of a table name: quotes dropped and case folded, e.g. 'analytics.events'."""
+    return name.strip().replace('"', "").lower()
+
+
+def _identifier(name: str) -> str:
+    """Column name of a possibly quoted identifier; unquoted ones fold to lower case."""
+    name = name.strip()
+    if name.startswith('"') and name.endswith('"'):
+        return name[1:-1].replace('""', '"')
+    return name.lower()
+
+
+def _split_top_level(text: str, separator: str = ",") -> list:
+    """Split on ``separator`` outside parentheses and quotes."""
+    parts, depth, quote, current = [], 0, None, []
+    for char in text:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _closing_paren(text: str, start: int) -> int:
+    """Index of the parenthesis closing the one at ``start``."""
+    depth, quote = 0, None
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote:
+            quote = None if char == quote else quote
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index
+    raise _StatementError("syntax error: unbalanced parentheses")
+
+
+def _outside_literals(sql: str, rewrite) -> str:
+    """Apply ``rewrite`` to the SQL text between string literals."""
+    parts = re.split(r"('(?:[^']|'')*')", sql)
+    return "".join(part if index % 2 else rewrite(part) for index, part in enumerate(parts))
+
+
+def _column_type(type_sql: str):
+    """polars dtype a Redshift column type is stored as; unknown types are text."""
+    type_sql = " ".join(type_sql.upper().split())
+    decimal = re.match(r"(?:DECIMAL|NUMERIC)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?$", type_sql)
+    if decimal:
+        return pl.Decimal(int(decimal.group(1) or 18), int(decimal.group(2) or 0))
+    base = re.match(r"[A-Z][A-Z0-9 ]*", type_sql)
+    return COLUMN_TYPES.get(base.group().strip() if base else "", pl.Utf8)
+
+
+def _parse_columns(body: str) -> dict:
+    """Schema of the column definitions inside CREATE TABLE (...)."""
+    schema = {}
+    for definition in _split_top_level(body):
+        if re.match(r"(?:primary\s+key|unique|foreign\s+key|constraint|distkey|sortkey)\b", definition, re.I):
+            continue
+        match = re.match(rf'("(?:[^"]|"")+"|\w+)\s+(.+?)(?:\s+(?:{COLUMN_ATTRIBUTES})\b.*)?$', definition,
+                         re.IGNORECASE | re.DOTALL)
+        if not match:
+            raise _StatementError(f"syntax error in column definition: {definition}")
+        schema[_identifier(match.group(1))] = _column_type(match.group(2))
+    if not schema:
+        raise _StatementError("CREATE TABLE needs at least one column")
+    return schema
+
+
+def _join_keys(condition: str) -> list:
+    """Columns matched by an ``a."k" = b."k" AND ...`` join condition."""
+    keys = []
+    for clause in re.split(r"\s+and\s+", condition.strip(), flags=re.IGNORECASE):
+        match = re.match(r'(?:[\w."]+\.)?("(?:[^"]|"")+"|\w+)\s*=\s*(?:[\w."]+\.)?("(?:[^"]|"")+"|\w+)$', clause.strip())
+        if not match or _identifier(match.group(1)) != _identifier(match.group(2)):
+            raise _StatementError(f"only equality on same-named columns is supported in: {condition}")
+        keys.append(_identifier(match.group(1)))
+    return keys
+
+
+def _type_name(dtype) -> dict:
+    """Data API ColumnMetadata type fields for a polars dtype."""
+    if isinstance(dtype, pl.Decimal):
+        return {"typeName": "numeric", "precision": dtype.precision or 38, "scale": dtype.scale or 0}
+    if dtype in (pl.Int8, pl.Int16, pl.UInt8):
+        return {"typeName": "int2"}
+    if dtype in (pl.Int32, pl.UInt16):
+        return {"typeName": "int4"}
+    if dtype in (pl.Int64, pl.UInt32, pl.UInt64):
+        return {"typeName": "int8"}
+    if dtype == pl.Float32:
+        return {"typeName": "float4"}
+    if dtype == pl.Float64:
+        return {"typeName": "float8"}
+    if dtype == pl.Boolean:
+        return {"typeName": "bool"}
+    if dtype == pl.Date:
+        return {"typeName": "date"}
+    if dtype == pl.Time:
+        return {"typeName": "time"}
+    if isinstance(dtype, pl.Datetime):
+        return {"typeName": "timestamptz" if dtype.time_zone else "timestamp"}
+    return {"typeName": "varchar"}
+
+
+def _typed_value(value, type_name: str) -> dict:
+    """Data API field for one value, as GetStatementResult returns it."""
+    if value is None:
+        return {"isNull": True}
+    if type_name in ("int2", "int4", "int8"):
+        return {"longValue": int(value)}
+    if type_name in ("float4", "float8"):
+        return {"doubleValue": float(value)}
+    if type_name == "bool":
+        return {"booleanValue": bool(value)}
+    if type_name == "time":
+        return {"stringValue": value.isoformat(timespec="microseconds")}
+    if type_name == "timestamp":
+        return {"stringValue": value.strftime("%Y-%m-%d %H:%M:%S.%f")}
+    if type_name == "timestamptz":
+        return {"stringValue": value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f") + "+00"}
+    if type_name == "date":
+        return {"stringValue": value.isoformat()}
+    return {"stringValue": str(value)}
+
+
+def _to_bool(values: pl.Series) -> pl.Series:
+    """Parse text the way COPY reads BOOLEAN fields."""
+    lowered = values.str.strip_chars().str.to_lowercase()
+    return (pl.when(lowered.is_in(["t", "true", "1", "y", "yes", "on"])).then(True)
+            .when(lowered.is_in(["f", "false", "0", "n", "no", "off"])).then(False)
+            .otherwise(None))
+
+
+def _conform(frame: pl.DataFrame, schema: dict, columns: list = None, action: str = "INSERT") -> pl.DataFrame:
+    """
+    Map the columns of ``frame`` by position onto ``columns`` (default: the
+    table's columns in order) and cast them to the table's types; table
+    columns that get no value are NULL.
+    """
+    columns = columns or list(schema)[:frame.width]
+    if frame.width != len(columns):
+        raise _StatementError(f"{action} has {frame.width} column(s) but {len(columns)} target column(s)")
+    unknown = [column for column in columns if column not in schema]
+    if unknown:
+        raise _StatementError(f'column "{unknown[0]}" does not exist')
+    values = dict(zip(columns, frame.get_columns()))
+    conformed = []
+    for name, dtype in schema.items():
+        if name not in values:
+            conformed.append(pl.Series(name, [None] * frame.height, dtype=dtype))
+            continue
+        series = values[name].alias(name)
+        if series.dtype == dtype:
+            conformed.append(series)
+            continue
+        try:
+            if dtype == pl.Boolean and series.dtype == pl.Utf8:
+                series = pl.select(_to_bool(series).alias(name)).to_series()
+            elif isinstance(dtype, pl.Datetime) and series.dtype == pl.Utf8:
+                series = series.str.to_datetime(time_unit="us", time_zone=dtype.time_zone)
+            elif dtype == pl.Date and series.dtype == pl.Utf8:
+                series = series.str.to_date()
+            elif dtype == pl.Time and series.dtype == pl.Utf8:
+                series = series.str.to_time()
+            conformed.append(series.cast(dtype, strict=True))
+        except pl.exceptions.PolarsError as e:
+            raise _StatementError(f'{action} failed for column "{name}" ({dtype}): {e}') from e
+    return pl.DataFrame(conformed)
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "bzip2":
+        return bz2.compress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise _StatementError("ZSTD files need the 'zstandard' package")
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _decompress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "bzip2":
+        return bz2.decompress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise _StatementError("ZSTD files need the 'zstandard' package")
+        # Streaming decompression: frames written in one go may not record their size
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+    return data
+
+
+def _option(pattern: str, options: str, default=None):
+    """First group of ``pattern`` in the statement options, or ``default``."""
+    match = re.search(pattern, options, re.IGNORECASE)
+    return match.group(1) if match else default
+
+
+def _flag(pattern: str, options: str) -> bool:
+    return re.search(pattern, options, re.IGNORECASE) is not None
+
+
+def _file_format(options: str) -> str:
+    """Data format of a COPY or UNLOAD; 'text' is the pipe-delimited default."""
+    name = _option(r"\bformat\s+(?:as\s+)?([\w.]+)", options)
+    if name is None:
+        name = _option(r"\b(csv|json|parquet|avro|orc)\b", options, "text")
+    name = name.lower()
+    if name not in FILE_FORMATS + ("text",):
+        raise _StatementError(f"unsupported format {name}")
+    return name
+
+
+def _compression(options: str) -> str:
+    name = _option(r"\b(gzip|bzip2|zstd|lzop)\b", options)
+    if name is not None and name.lower() == "lzop":
+        raise _StatementError("LZOP is not supported by the local engine")
+    return name.lower() if name else None
+
+
+class _Statement:
+    """State of one submitted statement or batch."""
+
+    def __init__(self, statement_id: str, sqls: list, is_batch: bool, connection: dict):
+        self.id = statement_id
+        self.is_batch = is_batch
+        self.connection = connection
+        self.status = "SUBMITTED"
+        self.error = None
+        self.created_at = datetime.now(timezone.utc)
+        self.updated_at = self.created_at
+        self.duration_ns = -1
+        self.cancel_requested = False
+        self.future = None
+        self.subs = [{"Id": f"{statement_id}:{index}" if is_batch else statement_id, "QueryString": sql,
+                      "Status": "SUBMITTED", "Duration": -1, "ResultRows": -1, "RedshiftQueryId": 0,
+                      "HasResultSet": False, "CreatedAt": self.created_at, "UpdatedAt": self.created_at,
+                      "frame": None}
+                     for index, sql in enumerate(sqls, start=1)]
+
+    def set_status(self, status: str, sub: dict = None) -> None:
+        """Move the statement, or one of its sub-statements, to ``status``."""
+        now = datetime.now(timezone.utc)
+        if sub is None:
+            self.status, self.updated_at = status, now
+        else:
+            sub["Status"], sub["UpdatedAt"] = status, now
+
+
+class _Transaction:
+    """
+    Working copy of the catalog for one statement or batch; it replaces the
+    catalog only if every statement succeeds.
+    """
+
+    def __init__(self, tables: dict, statement: _Statement):
+        self.tables = dict(tables)
+        self.temp = set()
+        self.statement = statement
+        self.load_commits = []
+        self.s3client = []
+
+    def check(self) -> None:
+        if self.statement.cancel_requested:
+            raise _StatementCancelled()
+
+    def lookup(self, name: str) -> str:
+        """Catalog key of an existing table; unqualified names resolve through 'public'."""
+        key = _table_key(name)
+        if key in self.tables:
+            return key
+        if "." not in key and f"public.{key}" in self.tables:
+            return f"public.{key}"
+        raise _StatementError(f'relation "{key}" does not exist')
+
+    def create(self, name: str, frame: pl.DataFrame, temp: bool = False, if_not_exists: bool = False) -> None:
+        key = _table_key(name)
+        if temp and "." in key:
+            raise _StatementError("temporary tables cannot be created in a schema")
+        if key in self.tables:
+            if if_not_exists:
+                return
+            raise _StatementError(f'relation "{key}" already exists')
+        self.tables[key] = frame
+        if temp:
+            self.temp.add(key)
+
+
+class LocalS3:
+    """
+    Thread-safe in-memory S3 with the client calls redshift_utils makes:
+    uploads (single and multipart), downloads, listings with delimiters and
+    pagination, and deletes.
+
+    Objects live in memory as bytes, so they can be inspected with
+    ``get_bytes`` and ``keys`` from tests and benchmarks.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_LIST_MAX_KEYS):
+        self.max_keys = max_keys
+        self._objects = {}
+        self._uploads = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _etag(data: bytes) -> str:
+        return '"' + hashlib.md5(data).hexdigest() + '"'
+
+    @staticmethod
+    def _read_body(body) -> bytes:
+        if isinstance(body, str):
+            return body.encode("utf-8")
+        if hasattr(body, "read"):
+            return body.read()
+        return bytes(body)
+
+    def keys(self, bucket: str, prefix: str = "") -> list:
+        """Keys under a prefix, in key order."""
+        with self._lock:
+            return sorted(key for b, key in self._objects if b == bucket and key.startswith(prefix))
+
+    def get_bytes(self, bucket: str, key: str) -> bytes:
+        """Content of an object."""
+        return self.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+    def put_object(self, Bucket: str, Key: str, Body=b"", **kwargs) -> dict:
+        data = self._read_body(Body)
+        with self._lock:
+            self._objects[(Bucket, Key)] = (data, datetime.now(timezone.utc))
+        return {"ETag": self._etag(data)}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str, ExtraArgs=None, Callback=None, Config=None) -> None:
+        with open(Filename, "rb") as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read())
+
+    def upload_fileobj(self, Fileobj, Bucket: str, Key: str, ExtraArgs=None, Callback=None, Config=None) -> None:
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj.read())
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        with self._lock:
+            stored = self._objects.get((Bucket, Key))
+        if stored is None:
+            raise _client_error("NoSuchKey", "The specified key does not exist.", "GetObject")
+        data, modified = stored
+        return {"Body": io.BytesIO(data), "ContentLength": len(data), "ETag": self._etag(data),
+                "LastModified": modified}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        with self._lock:
+            stored = self._objects.get((Bucket, Key))
+        if stored is None:
+            raise _client_error("404", "Not Found", "HeadObject")
+        data, modified = stored
+        return {"ContentLength": len(data), "ETag": self._etag(data), "LastModified": modified}
+
+    def download_file(self, Bucket: str, Key: str, Filename: str, ExtraArgs=None, Callback=None, Config=None) -> None:
+        with open(Filename, "wb") as f:
+            f.write(self.get_bytes(Bucket, Key))
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        with self._lock:
+            self._objects.pop((Bucket, Key), None)
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict, **kwargs) -> dict:
+        keys = [obj["Key"] for obj in Delete.get("Objects", [])]
+        with self._lock:
+            for key in keys:
+                self._objects.pop((Bucket, key), None)
+        return {} if Delete.get("Quiet") else {"Deleted": [{"Key": key} for key in keys]}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", Delimiter: str = None, MaxKeys: int = None,
+                        ContinuationToken: str = None, StartAfter: str = None, **kwargs) -> dict:
+        max_keys = MaxKeys or self.max_keys
+        with self._lock:
+            objects = {key: stored for (bucket, key), stored in self._objects.items()
+                       if bucket == Bucket and key.startswith(Prefix)}
+        # Keys and common prefixes share one ordering and one page budget
+        entries = {}
+        for key, (data, modified) in objects.items():
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                common = Prefix + rest[:rest.index(Delimiter) + len(Delimiter)]
+                entries[common] = None
+            else:
+                entries[key] = {"Key": key, "Size": len(data), "ETag": self._etag(data), "LastModified": modified}
+        names = sorted(entries)
+        after = ContinuationToken or StartAfter
+        if after:
+            names = [name for name in names if name > after]
+        page, truncated = names[:max_keys], len(names) > max_keys
+
+        response = {"Name": Bucket, "Prefix": Prefix, "MaxKeys": max_keys, "KeyCount": len(page),
+                    "IsTruncated": truncated}
+        contents = [entries[name] for name in page if entries[name] is not None]
+        prefixes = [{"Prefix": name} for name in page if entries[name] is None]
+        if contents:
+            response["Contents"] = contents
+        if prefixes:
+            response["CommonPrefixes"] = prefixes
+        if Delimiter:
+            response["Delimiter"] = Delimiter
+        if truncated:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def get_paginator(self, operation_name: str) -> "_LocalPaginator":
+        if operation_name != "list_objects_v2":
+            raise NotImplementedError(f"LocalS3 has no paginator for {operation_name}")
+        return _LocalPaginator(self.list_objects_v2)
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> dict:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[upload_id] = (Bucket, Key, {})
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body, **kwargs) -> dict:
+        data = self._read_body(Body)
+        with self._lock:
+            if UploadId not in self._uploads:
+                raise _client_error("NoSuchUpload", "The specified upload does not exist.", "UploadPart")
+            self._uploads[UploadId][2][PartNumber] = data
+        return {"ETag": self._etag(data)}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict,
+                                  **kwargs) -> dict:
+        with self._lock:
+            upload = self._uploads.pop(UploadId, None)
+        if upload is None:
+            raise _client_error("NoSuchUpload", "The specified upload does not exist.", "CompleteMultipartUpload")
+        parts = upload[2]
+        data = b"".join(parts[part["PartNumber"]] for part in sorted(MultipartUpload["Parts"],
+                                                                      key=lambda part: part["PartNumber"]))
+        return self.put_object(Bucket=Bucket, Key=Key, Body=data)
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs) -> dict:
+        with self._lock:
+            self._uploads.pop(UploadId, None)
+        return {}
+
+
+class _LocalPaginator:
+    def __init__(self, operation):
+        self._operation = operation
+
+    def paginate(self, PaginationConfig: dict = None, **kwargs):
+        token = None
+        while True:
+            page = self._operation(ContinuationToken=token, **kwargs)
+            yield page
+            token = page.get("NextContinuationToken")
+            if not token:
+                return
+
+
+class LocalRedshiftData:
+    """
+    In-process ``redshift-data`` client backed by a polars engine.
+
+    Each statement, or batch of statements, runs on a thread pool as one
+    transaction against a working copy of the catalog that replaces it only
+    if every statement succeeds; temporary tables are dropped at the end.
+    Transactions commit one at a time. Every statement gets a Redshift query
+    ID, and COPY records its files per slice in STL_LOAD_COMMITS and
+    STL_S3CLIENT, which queries can read.
+
+    Args:
+        s3: LocalS3 that COPY reads from and UNLOAD writes to
+        num_slices: slices reported by STV_SLICES and used to split UNLOAD output
+        max_concurrency: statements running at once
+        page_size: records per GetStatementResult page
+    """
+
+    def __init__(self,
+                 s3: LocalS3,
+                 num_slices: int = DEFAULT_LOCAL_SLICES,
+                 max_concurrency: int = DEFAULT_LOCAL_CONCURRENCY,
+                 page_size: int = DEFAULT_RESULT_PAGE_ROWS):
+        self.s3 = s3
+        self.num_slices = num_slices
+        self.page_size = page_size
+        self.tables = {}
+        self._load_commits = []
+        self._s3client = []
+        self._statements = {}
+        self._query_ids = itertools.count(100000)
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="local-redshift")
+
+    def close(self) -> None:
+        """Shut down the statement thread pool."""
+        self._executor.shutdown(wait=True)
+
+    ### Data API
+    def execute_statement(self, Sql: str, Database: str = None, DbUser: str = None, ClusterIdentifier: str = None,
+                          **kwargs) -> dict:
+        return self._start([Sql], False, Database, DbUser, ClusterIdentifier)
+
+    def batch_execute_statement(self, Sqls: list, Database: str = None, DbUser: str = None,
+                                ClusterIdentifier: str = None, **kwargs) -> dict:
+        if not Sqls:
+            raise _client_error("ValidationException", "Sqls must contain at least one statement",
+                                "BatchExecuteStatement")
+        return self._start(list(Sqls), True, Database, DbUser, ClusterIdentifier)
+
+    def describe_statement(self, Id: str) -> dict:
+        statement = self._statement(Id, "DescribeStatement")
+        with self._lock:
+            desc = {
+                "Id": statement.id,
+                "Status": statement.status,
+                "QueryString": "; ".join(sub["QueryString"] for sub in statement.subs),
+                "CreatedAt": statement.created_at,
+                "UpdatedAt": statement.updated_at,
+                "Duration": statement.duration_ns,
+                "HasResultSet": not statement.is_batch and statement.subs[0]["HasResultSet"],
+                "ResultRows": -1 if statement.is_batch else statement.subs[0]["ResultRows"],
+                "RedshiftQueryId": statement.subs[-1]["RedshiftQueryId"],
+                **statement.connection,
+            }
+            if statement.error is not None:
+                desc["Error"] = statement.error
+            if statement.is_batch:
+                desc["SubStatements"] = [{name: value for name, value in sub.items() if name != "frame"}
+                                         for sub in statement.subs]
+        return desc
+
+    def get_statement_result(self, Id: str, NextToken: str = None) -> dict:
+        statement = self._statement(Id.split(":")[0], "GetStatementResult")
+        subs = [sub for sub in statement.subs if sub["Id"] == Id]
+        if not subs or subs[0]["Status"] != "FINISHED" or subs[0]["frame"] is None:
+            raise _client_error("ResourceNotFoundException", f"Query does not have result. Please check query "
+                                f"status with DescribeStatement: {Id}", "GetStatementResult")
+        frame = subs[0]["frame"]
+        metadata = [{"name": name, "label": name, "nullable": 1, "schemaName": "", "tableName": "",
+                     **_type_name(dtype)}
+                    for name, dtype in frame.schema.items()]
+        type_names = [column["typeName"] for column in metadata]
+
+        offset = int(NextToken) if NextToken else 0
+        page = frame.slice(offset, self.page_size)
+        records = [[_typed_value(value, type_name) for value, type_name in zip(row, type_names)]
+                   for row in page.iter_rows()]
+        response = {"ColumnMetadata": metadata, "Records": records, "TotalNumRows": frame.height}
+        if offset + self.page_size < frame.height:
+            response["NextToken"] = str(offset + self.page_size)
+        return response
+
+    def cancel_statement(self, Id: str) -> dict:
+        statement = self._statement(Id, "CancelStatement")
+        with self._lock:
+            if statement.status not in RUNNING_STATUSES:
+                raise _client_error("ValidationException", f"Could not cancel a query that is already in "
+                                    f"{statement.status} state with ID: {Id}", "CancelStatement")
+            statement.cancel_requested = True
+            # Not picked up by a worker yet: it never starts
+            if statement.future is not None and statement.future.cancel():
+                statement.error = "Query cancelled."
+                statement.set_status("ABORTED")
+                for sub in statement.subs:
+                    statement.set_status("ABORTED", sub)
+        return {"Status": True}
+
+    ### Execution
+    def _statement(self, statement_id: str, operation: str) -> _Statement:
+        with self._lock:
+            statement = self._statements.get(statement_id)
+        if statement is None:
+            raise _client_error("ResourceNotFoundException", f"Query does not exist: {statement_id}", operation)
+        return statement
+
+    def _start(self, sqls: list, is_batch: bool, database: str, db_user: str, cluster_id: str) -> dict:
+        connection = {"Database": database, "DbUser": db_user, "ClusterIdentifier": cluster_id}
+        statement = _Statement(str(uuid.uuid4()), sqls, is_batch, connection)
+        with self._lock:
+            self._statements[statement.id] = statement
+            statement.future = self._executor.submit(self._run, statement)
+        return {"Id": statement.id, "CreatedAt": statement.created_at, **connection}
+
+    def _run(self, statement: _Statement) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            if statement.cancel_requested:
+                statement.error = "Query cancelled."
+                for sub in statement.subs:
+                    statement.set_status("ABORTED", sub)
+                statement.set_status("ABORTED")
+                return
+            statement.set_status("STARTED")
+        current = None
+        try:
+            # Serializable: one transaction reads and replaces the catalog at a time
+            with self._commit_lock:
+                transaction = _Transaction(self.tables, statement)
+                for sub in statement.subs:
+                    current = sub
+                    transaction.check()
+                    sub_started = time.perf_counter()
+                    with self._lock:
+                        sub["RedshiftQueryId"] = next(self._query_ids)
+                        statement.set_status("STARTED", sub)
+                    rows, frame = self._execute(sub["QueryString"], transaction, sub["RedshiftQueryId"])
+                    with self._lock:
+                        sub.update(ResultRows=rows, frame=frame, HasResultSet=frame is not None,
+                                   Duration=int((time.perf_counter() - sub_started) * pow(10, 9)))
+                        statement.set_status("FINISHED", sub)
+                    current = None
+                transaction.check()
+                for key in transaction.temp:
+                    transaction.tables.pop(key, None)
+                self.tables = transaction.tables
+                self._load_commits.extend(transaction.load_commits)
+                self._s3client.extend(transaction.s3client)
+            status, error = "FINISHED", None
+        except _StatementCancelled:
+            status, error = "ABORTED", "Query cancelled."
+        except Exception as e:
+            status, error = "FAILED", f"ERROR: {e}"
+
+        with self._lock:
+            statement.duration_ns = int((time.perf_counter() - started) * pow(10, 9))
+            statement.error = error
+            for sub in statement.subs:
+                if sub["Status"] in RUNNING_STATUSES:
+                    if sub is current and status == "FAILED":
+                        sub["Error"] = error
+                    statement.set_status(status if sub is current else "ABORTED", sub)
+            statement.set_status(status)
+
+    def _execute(self, sql: str, transaction: _Transaction, query_id: int):
+        """
+        Run one statement inside a transaction.
+
+        Returns:
+            (rows affected or -1, result frame or None)
+        """
+        sql = sql.strip().rstrip(";").strip()
+        for kind, pattern in STATEMENT_PATTERNS:
+            match = pattern.match(sql)
+            if match:
+                return getattr(self, f"_{kind}")(match, transaction, query_id)
+        raise _StatementError(f"statement not supported by the local engine: {sql[:80]}")
+
+    def _system_tables(self) -> dict:
+        return {
+            "stv_slices": pl.DataFrame({"slice": list(range(self.num_slices)), "node": [0] * self.num_slices},
+                                       schema={"slice": pl.Int32, "node": pl.Int32}),
+            "stl_load_commits": pl.DataFrame(self._load_commits, schema={
+                "query": pl.Int64, "slice": pl.Int32, "name": pl.Utf8, "filename": pl.Utf8,
+                "lines_scanned": pl.Int64, "curtime": pl.Datetime("us")}),
+            "stl_s3client": pl.DataFrame(self._s3client, schema={
+                "query": pl.Int64, "slice": pl.Int32, "bucket": pl.Utf8, "key": pl.Utf8,
+                "data_size": pl.Int64, "transfer_time": pl.Int64}),
+        }
+
+    def _query_frame(self, query: str, transaction: _Transaction) -> pl.DataFrame:
+        """Result of a SELECT, run by the polars SQL engine over the catalog."""
+        frames = self._system_tables()
+        for key, frame in transaction.tables.items():
+            frames[key] = frame
+            # The default search path: public tables answer to their bare name
+            if key.startswith("public."):
+                frames.setdefault(key[len("public."):], frame)
+
+        # polars resolves dotted names only when quoted as one identifier
+        qualified = sorted((key for key in frames if "." in key), key=len, reverse=True)
+        patterns = []
+        for key in qualified:
+            schema, table = key.split(".", 1)
+            patterns.append((re.compile(rf'(?<![\w."])"?{re.escape(schema)}"?\s*\.\s*"?{re.escape(table)}"?(?![\w"])',
+                                        re.IGNORECASE), f'"{key}"'))
+
+        def rewrite(text):
+            for pattern, replacement in patterns:
+                text = pattern.sub(replacement, text)
+            return text
+
+        try:
+            return pl.SQLContext(frames=frames).execute(_outside_literals(query, rewrite), eager=True)
+        except pl.exceptions.PolarsError as e:
+            raise _StatementError(str(e).splitlines()[0]) from e
+
+    ### Statements
+    def _query(self, match, transaction: _Transaction, query_id: int):
+        frame = self._query_frame(match.group("query"), transaction)
+        return frame.height, frame
+
+    def _explain(self, match, transaction: _Transaction, query_id: int):
+        frame = self._query_frame(match.group("query"), transaction)
+        width = math.ceil(frame.estimated_size() / frame.height) if frame.height else 0
+        plan = [f"XN Seq Scan on query  (cost=0.00..{frame.height / 100:.2f} rows={frame.height} width={width})"]
+        return len(plan), pl.DataFrame({"QUERY PLAN": plan})
+
+    def _noop(self, match, transaction: _Transaction, query_id: int):
+        return -1, None
+
+    def _create(self, match, transaction: _Transaction, query_id: int):
+        body = match.group("body")
+        schema = _parse_columns(body[1:_closing_paren(body, 0)])
+        transaction.create(match.group("table"), pl.DataFrame(schema=schema), bool(match.group("temp")),
+                           bool(match.group("if_not_exists")))
+        return -1, None
+
+    def _create_like(self, match, transaction: _Transaction, query_id: int):
+        like = transaction.tables[transaction.lookup(match.group("like"))]
+        transaction.create(match.group("table"), like.clear(), bool(match.group("temp")),
+                           bool(match.group("if_not_exists")))
+        return -1, None
+
+    def _create_as(self, match, transaction: _Transaction, query_id: int):
+        frame = self._query_frame(match.group("query"), transaction)
+        transaction.create(match.group("table"), frame, bool(match.group("temp")), bool(match.group("if_not_exists")))
+        return frame.height, None
+
+    def _drop(self, match, transaction: _Transaction, query_id: int):
+        for name in _split_top_level(match.group("tables")):
+            try:
+                key = transaction.lookup(name)
+            except _StatementError:
+                if match.group("if_exists"):
+                    continue
+                raise
+            del transaction.tables[key]
+            transaction.temp.discard(key)
+        return -1, None
+
+    def _rename(self, match, transaction: _Transaction, query_id: int):
+        key = transaction.lookup(match.group("table"))
+        schema = key.rsplit(".", 1)[0] + "." if "." in key else ""
+        new_key = schema + _table_key(match.group("new_name"))
+        if new_key in transaction.tables:
+            raise _StatementError(f'relation "{new_key}" already exists')
+        transaction.tables[new_key] = transaction.tables.pop(key)
+        if key in transaction.temp:
+            transaction.temp.discard(key)
+            transaction.temp.add(new_key)
+        return -1, None
+
+    def _truncate(self, match, transaction: _Transaction, query_id: int):
+        key = transaction.lookup(match.group("table"))
+        transaction.tables[key] = transaction.tables[key].clear()
+        return -1, None
+
+    def _delete(self, match, transaction: _Transaction, query_id: int):
+        key = transaction.lookup(match.group("table"))
+        table = transaction.tables[key]
+        if match.group("condition") is None:
+            transaction.tables[key] = table.clear()
+            return table.height, None
+        kept = self._query_frame(f"SELECT * FROM {key} WHERE NOT COALESCE(({match.group('condition')}), FALSE)",
+                                 transaction)
+        transaction.tables[key] = kept
+        return table.height - kept.height, None
+
+    def _delete_using(self, match, transaction: _Transaction, query_id: int):
+        key = transaction.lookup(match.group("table"))
+        source = transaction.tables[transaction.lookup(match.group("source"))]
+        keys = _join_keys(match.group("condition"))
+        table = transaction.tables[key]
+        kept = table.join(source.select(keys).unique(), on=keys, how="anti", maintain_order="left")
+        transaction.tables[key] = kept
+        return table.height - kept.height, None
+
+    def _insert(self, match, transaction: _Transaction, query_id: int):
+        key = transaction.lookup(match.group("table"))
+        table = transaction.tables[key]
+        columns = [_identifier(column) for column in _split_top_level(match.group("columns") or "")]
+        frame = _conform(self._query_frame(match.group("query"), transaction), table.schema, columns)
+        transaction.tables[key] = pl.concat([table, frame], how="vertical")
+        return frame.height, None
+
+    def _merge(self, match, transaction: _Transaction, query_id: int):
+        key = transaction.lookup(match.group("table"))
+        table = transaction.tables[key]
+        source = _conform(transaction.tables[transaction.lookup(match.group("source"))], table.schema,
+                          action="MERGE")
+        keys = _join_keys(match.group("condition"))
+        kept = table.join(source.select(keys).unique(), on=keys, how="anti", maintain_order="left")
+        transaction.tables[key] = pl.concat([kept, source], how="vertical")
+        return source.height, None
+
+    def _copy(self, match, transaction: _Transaction, query_id: int):
+        key = transaction.lookup(match.group("table"))
+        table = transaction.tables[key]
+        columns = [_identifier(column) for column in _split_top_level(match.group("columns") or "")]
+        raw_options = match.group("options")
+        options = re.sub(r"'(?:[^']|'')*'", "''", raw_options)
+
+        file_format = _file_format(options)
+        if file_format == "orc":
+            raise _StatementError("ORC is not supported by the local engine")
+        compression = _compression(options)
+        skip_lines = int(_option(r"\bignoreheader\s+(?:as\s+)?(\d+)", options, 0))
+        delimiter = _option(r"\bdelimiter\s+(?:as\s+)?'((?:[^']|'')*)'", raw_options,
+                            "," if file_format == "csv" else "|").replace("''", "'")
+
+        bucket, prefix = _split_s3_uri(match.group("source"))
+        if _flag(r"\bmanifest\b", options):
+            manifest = json.loads(self._read_object(bucket, prefix, "manifest"))
+            urls = [_split_s3_uri(entry["url"]) + (bool(entry.get("mandatory")),)
+                    for entry in manifest.get("entries", [])]
+        else:
+            urls = [(bucket, file_key, True) for file_key in self.s3.keys(bucket, prefix)]
+            if not urls:
+                raise _StatementError(f"The specified S3 prefix '{prefix}' does not exist")
+
+        frames = []
+        for index, (file_bucket, file_key, mandatory) in enumerate(urls):
+            transaction.check()
+            # Optional manifest entries may be missing
+            if not mandatory and file_key not in self.s3.keys(file_bucket, file_key):
+                continue
+            read_started = time.perf_counter()
+            data = self._read_object(file_bucket, file_key, "data file")
+            transfer_us = int((time.perf_counter() - read_started) * pow(10, 6))
+            frame = self._parse_file(_decompress(data, compression), file_format, delimiter, skip_lines)
+            if file_format in ("json", "avro"):
+                # JSON 'auto' and Avro map fields to columns by name
+                lowered = {name.lower(): name for name in frame.columns}
+                targets = columns or list(table.schema)
+                frame = pl.DataFrame([frame[lowered[name.lower()]].alias(name) if name.lower() in lowered
+                                      else pl.Series(name, [None] * frame.height, dtype=pl.Utf8)
+                                      for name in targets])
+            frames.append(_conform(frame, table.schema, columns, action=f"Load into table '{key}'"))
+
+            slice_ = index % self.num_slices
+            url = f"s3://{file_bucket}/{file_key}"
+            lines = frame.height + (skip_lines if file_format in ("csv", "text") else 0)
+            transaction.load_commits.append({"query": query_id, "slice": slice_, "name": url,
+                                             "filename": url, "lines_scanned": lines,
+                                             "curtime": datetime.now()})
+            transaction.s3client.append({"query": query_id, "slice": slice_, "bucket": file_bucket, "key": file_key,
+                                         "data_size": len(data), "transfer_time": transfer_us})
+
+        loaded = pl.concat(frames, how="vertical") if frames else table.clear()
+        transaction.tables[key] = pl.concat([table, loaded], how="vertical")
+        return loaded.height, None
+
+    def _read_object(self, bucket: str, key: str, what: str) -> bytes:
+        try:
+            return self.s3.get_bytes(bucket, key)
+        except ClientError as e:
+            raise _StatementError(f"S3 {what} s3://{bucket}/{key} could not be read: {e}") from e
+
+    @staticmethod
+    def _parse_file(data: bytes, file_format: str, delimiter: str, skip_lines: int) -> pl.DataFrame:
+        if file_format == "parquet":
+            return pl.read_parquet(io.BytesIO(data))
+        if file_format == "avro":
+            return pl.read_avro(io.BytesIO(data))
+        if file_format == "json":
+            return pl.read_ndjson(io.BytesIO(data)) if data.strip() else pl.DataFrame()
+        try:
+            # Fields stay text until they are cast to the table's column types
+            return pl.read_csv(io.BytesIO(data), has_header=False, skip_rows=skip_lines, separator=delimiter,
+                               infer_schema=False, quote_char='"' if file_format == "csv" else None)
+        except pl.exceptions.NoDataError:
+            return pl.DataFrame()
+
+    def _unload(self, match, transaction: _Transaction, query_id: int):
+        frame = self._query_frame(match.group("query").replace("''", "'"), transaction)
+        raw_options = match.group("options")
+        options = re.sub(r"'(?:[^']|'')*'", "''", raw_options)
+
+        file_format = _file_format(options)
+        if file_format not in ("csv", "json", "parquet", "text"):
+            raise _StatementError(f"UNLOAD does not write {file_format}")
+        compression = _compression(options)
+        if compression and file_format == "parquet":
+            raise _StatementError("compression cannot be used with PARQUET")
+        header = _flag(r"\bheader\b", options)
+        delimiter = _option(r"\bdelimiter\s+(?:as\s+)?'((?:[^']|'')*)'", raw_options,
+                            "," if file_format == "csv" else "|").replace("''", "'")
+        parallel = not _flag(r"\bparallel\s+(?:false|off)\b", options)
+        extension = _option(r"\bextension\s+'([^']*)'", raw_options)
+        max_size = re.search(r"\bmaxfilesize\s+(?:as\s+)?(\d+(?:\.\d+)?)\s*(mb|gb)?", options, re.IGNORECASE)
+        max_bytes = (float(max_size.group(1)) * pow(1024, 3 if (max_size.group(2) or "").lower() == "gb" else 2)
+                     if max_size else DEFAULT_UNLOAD_MAX_FILE_MB * pow(1024, 2))
+        row_group_mb = _option(r"\browgroupsize\s+(?:as\s+)?(\d+)", options)
+        partition = re.search(r"\bpartition\s+by\s*\(([^)]*)\)(\s+include)?", options, re.IGNORECASE)
+        manifest = re.search(r"\bmanifest(\s+verbose)?\b", options, re.IGNORECASE)
+
+        bucket, prefix = _split_s3_uri(match.group("destination"))
+        existing = self.s3.keys(bucket, prefix)
+        if _flag(r"\bcleanpath\b", options):
+            self.s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": key} for key in existing],
+                                                          "Quiet": True})
+        elif existing and not _flag(r"\ballowoverwrite\b", options):
+            raise _StatementError("Specified unload destination on S3 is not empty. Consider using a different "
+                                  "bucket / prefix, manually removing the target files in S3, or using the "
+                                  "ALLOWOVERWRITE option.")
+
+        if extension:
+            suffix = "." + extension.lstrip(".")
+        elif file_format == "parquet":
+            suffix = ".parquet"
+        else:
+            suffix = COMPRESSIONS[compression] if compression else ""
+
+        # One group per partition value, each under its own key=value/ prefix
+        if partition:
+            keys = [_identifier(column) for column in _split_top_level(partition.group(1))]
+            groups = []
+            base = prefix if not prefix or prefix.endswith("/") else prefix + "/"
+            for values, group in frame.partition_by(keys, maintain_order=True, include_key=bool(partition.group(2)),
+                                                    as_dict=True).items():
+                path = "".join(f"{column}={NULL_PARTITION if value is None else value}/"
+                               for column, value in zip(keys, values))
+                groups.append((base + path, group))
+        else:
+            groups = [(prefix, frame)]
+
+        entries = []
+        for group_prefix, group in groups:
+            # Each slice writes its share of the rows; without PARALLEL one slice writes them all
+            n_slices = self.num_slices if parallel else 1
+            size = math.ceil(group.height / n_slices) if group.height else 1
+            shares = [(slice_, group.slice(slice_ * size, size)) for slice_ in range(n_slices)]
+            shares = [(slice_, share) for slice_, share in shares if share.height] or [(0, group)]
+            file_number = 0
+            for slice_, share in shares:
+                for part, chunk in enumerate(self._split_by_size(share, max_bytes)):
+                    transaction.check()
+                    data = _compress(self._serialize(chunk, file_format, header, delimiter, row_group_mb),
+                                     compression)
+                    name = f"{slice_:04d}_part_{part:02d}" if parallel else f"{file_number:03d}"
+                    file_number += 1
+                    key = f"{group_prefix}{name}{suffix}"
+                    self.s3.put_object(Bucket=bucket, Key=key, Body=data)
+                    entries.append((f"s3://{bucket}/{key}", len(data), chunk.height))
+
+        if manifest:
+            verbose = bool(manifest.group(1))
+            document = {"entries": [
+                {"url": url, "meta": {"content_length": size, "record_count": rows}} if verbose else {"url": url}
+                for url, size, rows in entries
+            ]}
+            if verbose:
+                document["schema"] = {"elements": [{"name": name, "type": {"base": _type_name(dtype)["typeName"]}}
+                                                   for name, dtype in frame.schema.items()]}
+                document["meta"] = {"content_length": sum(size for _, size, _ in entries),
+                                    "record_count": frame.height}
+                document["author"] = {"name": "LocalRedshift", "version": "1.0"}
+            self.s3.put_object(Bucket=bucket, Key=prefix + MANIFEST_NAME, Body=json.dumps(document).encode("utf-8"))
+        return frame.height, None
+
+    @staticmethod
+    def _split_by_size(frame: pl.DataFrame, max_bytes: float) -> list:
+        """Row ranges of about ``max_bytes`` each, from the in-memory size of the frame."""
+        n_files = max(1, math.ceil(frame.estimated_size() / max_bytes))
+        size = math.ceil(frame.height / n_files) if frame.height else 1
+        return [frame.slice(offset, size) for offset in range(0, max(frame.height, 1), size)]
+
+    @staticmethod
+    def _serialize(frame: pl.DataFrame, file_format: str, header: bool, delimiter: str, row_group_mb) -> bytes:
+        buffer = io.BytesIO()
+        if file_format == "parquet":
+            row_group_size = None
+            if row_group_mb and frame.height:
+                rows_per_mb = frame.height / max(frame.estimated_size() / pow(1024, 2), 1e-9)
+                row_group_size = max(1, int(rows_per_mb * int(row_group_mb)))
+            frame.write_parquet(buffer, compression="snappy", row_group_size=row_group_size)
+        elif file_format == "json":
+            frame.write_ndjson(buffer)
+        else:
+            frame.write_csv(buffer, include_header=header, separator=delimiter,
+                            datetime_format="%Y-%m-%d %H:%M:%S%.f",
+                            quote_style="necessary" if file_format == "csv" else "never")
+        return buffer.getvalue()
+
+
+def _redshift_utils():
+    """
+    The redshift_utils module next to this one: a sibling inside the package, or
+    the top-level module when installed as plain modules or run as a script.
+    """
+    try:
+        from . import redshift_utils
+    except ImportError:
+        import redshift_utils
+    return redshift_utils
+
+
+class LocalRedshift:
+    """
+    A local cluster and S3 for running redshift_utils without AWS.
+
+    ``client()`` returns a RedshiftClient wired to the local services; every
+    UNLOAD, COPY, read and fetch then runs end to end, writing real files
+    into ``s3`` and returning real OperationResult timings.
+
+    Args:
+        num_slices: slices of the local cluster
+        max_concurrency: statements running at once
+        page_size: records per GetStatementResult page
+
+    Attributes:
+        s3: the LocalS3
+        redshift_data: the LocalRedshiftData
+    """
+
+    def __init__(self,
+                 num_slices: int = DEFAULT_LOCAL_SLICES,
+                 max_concurrency: int = DEFAULT_LOCAL_CONCURRENCY,
+                 page_size: int = DEFAULT_RESULT_PAGE_ROWS):
+        self.s3 = LocalS3()
+        self.redshift_data = LocalRedshiftData(self.s3, num_slices, max_concurrency, page_size)
+
+    def attach(self, client):
+        """Point an existing RedshiftClient at the local services and return it."""
+        with client._lock:
+            client._s3 = self.s3
+            client._redshift_data = self.redshift_data
+        return client
+
+    def client(self, **kwargs):
+        """
+        New RedshiftClient using the local services; ``kwargs`` go to RedshiftClient.
+
+        Polling starts faster than on a cluster, as local statements finish in milliseconds.
+        """
+        RedshiftClient = _redshift_utils().RedshiftClient
+
+        kwargs.setdefault("poll_initial_delay", 0.01)
+        kwargs.setdefault("poll_max_delay", 0.1)
+        return self.attach(RedshiftClient(**kwargs))
+
+    def create_table(self, name: str, df: pl.DataFrame) -> None:
+        """Create (or replace) a table holding ``df``, e.g. ``create_table('sales.orders', df)``."""
+        with self.redshift_data._commit_lock:
+            self.redshift_data.tables[_table_key(name)] = df
+
+    def table(self, name: str) -> pl.DataFrame:
+        """Current contents of a table."""
+        with self.redshift_data._commit_lock:
+            return self.redshift_data.tables[_table_key(name)]
+
+    def close(self) -> None:
+        self.redshift_data.close()
+
+
+def _benchmark(rows: int, stage_format: str, unload_format: str, num_slices: int) -> None:
+    """Time a copy_to_redshift -> unload_redshift -> read round trip on the local engine."""
+    utils = _redshift_utils()
+    UnloadOptions, set_default_client = utils.UnloadOptions, utils.set_default_client
+    copy_to_redshift, unload_redshift, read_redshift = utils.copy_to_redshift, utils.unload_redshift, utils.read_redshift
+
+    local = LocalRedshift(num_slices=num_slices)
+    set_default_client(local.client())
+    credentials = {"db": "dev", "cluster_id": "local", "db_user": "admin"}
+    role = "arn:aws:iam::000000000000:role/local"
+    df = pl.DataFrame({"id": pl.int_range(rows, eager=True)}).with_columns(
+        user=pl.format("user_{}", pl.col("id") % 1000),
+        score=pl.col("id") / 7,
+        day=pl.lit(date(2024, 1, 1)) + pl.duration(days=pl.col("id") % 365),
+    )
+
+    results = {}
+    results["copy"] = copy_to_redshift(df, "events", "bench", "bench-bucket", role=role, if_exists="replace",
+                                       stage_format=stage_format, num_slices=num_slices, verbose=0,
+                                       load_stats=True, **credentials)
+    results["unload"] = unload_redshift("SELECT * FROM bench.events", "s3://bench-bucket/unload/", role=role,
+                                        file_format=unload_format, verbose=0,
+                                        options=UnloadOptions(manifest_verbose=True), **credentials)
+    started = time.perf_counter()
+    read_back = read_redshift("SELECT * FROM bench.events", "bench-bucket", role=role, method="unload",
+                              verbose=0, **credentials)
+    read_seconds = time.perf_counter() - started
+
+    print(f"{rows} rows, stage_format={stage_format}, unload format={unload_format}, {num_slices} slices")
+    for name, result in results.items():
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in result.timings.items())
+        print(f"  {name}: {result.total_seconds:.3f}s ({phases}), rows={result.rows}, objects={result.s3_objects}")
+    stats = results["copy"].load_stats
+    if stats is not None:
+        print(f"  load: {stats.files} file(s) over {stats.slices} slice(s), skew {stats.skew:.2f}")
+    print(f"  read: {read_seconds:.3f}s, {read_back.height} rows")
+    local.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark a COPY/UNLOAD round trip on the local Redshift engine")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--stage-format", default="parquet")
+    parser.add_argument("--unload-format", default="parquet", choices=("csv", "json", "parquet"))
+    parser.add_argument("--slices", type=int, default=DEFAULT_LOCAL_SLICES)
+    args = parser.parse_args()
+    _benchmark(args.rows, args.stage_format, args.unload_format, args.slices)
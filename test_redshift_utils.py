@@ -1,7 +1,72 @@
+import asyncio
+import bz2
+import copy
+import dataclasses
+import gzip
+import io
+import itertools
+import importlib.util
+import json
+import os
+import pickle
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import polars as pl
-from redshift_utils import unload_redshift, copy_to_redshift, copy_s3_to_redshift
+import redshift_utils
+from redshift_local import LocalRedshift, LocalS3
+from redshift_utils import (
+    AsyncRedshiftClient,
+    CopyOptions,
+    QueryCache,
+    RedshiftClient,
+    UnloadOptions,
+    unload_redshift,
+    verify_s3_files,
+    read_redshift,
+    fetch_redshift,
+    iter_redshift_batches,
+    copy_to_redshift,
+    copy_s3_to_redshift,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_default_client():
+    """Make every test build its own default client from the patched session"""
+    redshift_utils.set_default_client(None)
+    yield
+    redshift_utils.set_default_client(None)
+
+
+def mock_client(execute=None, describe=None, **kwargs) -> RedshiftClient:
+    """
+    RedshiftClient whose Data API and S3 clients are Mocks.
+
+    Args:
+        execute: statement ID returned by execute_statement and
+            batch_execute_statement, or a list of responses or a function
+            used as the execute_statement side effect
+        describe: DescribeStatement response, or a list of responses or a
+            function of ``Id`` used as the side effect
+        **kwargs: RedshiftClient arguments
+    """
+    client = RedshiftClient(region_name="us-east-1", **kwargs)
+    client._redshift_data = Mock()
+    client._s3 = Mock()
+    if isinstance(execute, str):
+        client._redshift_data.execute_statement.return_value = {"Id": execute}
+        client._redshift_data.batch_execute_statement.return_value = {"Id": execute}
+    elif execute is not None:
+        client._redshift_data.execute_statement.side_effect = execute
+    if isinstance(describe, dict):
+        client._redshift_data.describe_statement.return_value = describe
+    elif describe is not None:
+        client._redshift_data.describe_statement.side_effect = describe
+    return client
 
 
 class TestUnloadRedshift:
@@ -27,7 +92,7 @@ class TestUnloadRedshift:
         mock_redshift_client = Mock()
         mock_s3_client = Mock()
         mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: {
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
             'redshift-data': mock_redshift_client,
             's3': mock_s3_client
         }[service]
@@ -76,7 +141,7 @@ class TestUnloadRedshift:
         mock_redshift_client = Mock()
         mock_s3_client = Mock()
         mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: {
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
             'redshift-data': mock_redshift_client,
             's3': mock_s3_client
         }[service]
@@ -121,6 +186,566 @@ class TestUnloadRedshift:
             )
 
 
+    def test_unload_options_clauses(self):
+        """Test every UnloadOptions setting renders its UNLOAD clause"""
+        client = mock_client("id")
+        options = UnloadOptions(compression="ZSTD", max_file_size_mb=512, manifest_verbose=True,
+                                partition_by=["region", "day"], partition_include=True, cleanpath=True)
+
+        client.submit_unload("SELECT * FROM t", "s3://bucket/out/", "db", "cluster", "user", "role",
+                             options=options, verbose=0)
+
+        sql = client._redshift_data.execute_statement.call_args[1]['Sql']
+        assert "PARTITION BY (region, day) INCLUDE" in sql
+        assert "ZSTD" in sql
+        assert "MAXFILESIZE 512 MB" in sql
+        assert "MANIFEST VERBOSE" in sql
+        assert "CLEANPATH" in sql
+        assert "ALLOWOVERWRITE" not in sql
+        assert "EXTENSION 'csv.zst'" in sql
+
+    def test_shorthand_arguments_map_to_options(self):
+        """Test gzip and partition_by keep working and agree with the options object"""
+        client = mock_client("id")
+
+        client.submit_unload("SELECT * FROM t", "s3://bucket/out/", "db", "cluster", "user", "role",
+                             file_format="json", partition_by="day", gzip=True, verbose=0)
+
+        sql = client._redshift_data.execute_statement.call_args[1]['Sql']
+        assert "PARTITION BY (day)" in sql
+        assert "GZIP" in sql
+        assert "EXTENSION 'json.gz'" in sql
+        with pytest.raises(ValueError, match="gzip inside options"):
+            client.submit_unload("SELECT 1", "s3://bucket/out/", "db", "cluster", "user", "role",
+                                 gzip=True, options=UnloadOptions(), verbose=0)
+
+    @pytest.mark.parametrize("kwargs, error, message", [
+        ({"max_file_size_mb": 2}, ValueError, "between 5 and 6200"),
+        ({"max_file_size_mb": 64.5}, TypeError, "must be an int"),
+        ({"row_group_size_mb": 256}, ValueError, "between 32 and 128"),
+        ({"compression": "lz4"}, ValueError, "compression must be one of"),
+        ({"partition_include": True}, ValueError, "needs partition_by"),
+    ])
+    def test_invalid_unload_options(self, kwargs, error, message):
+        """Test UnloadOptions rejects values Redshift would fail on"""
+        with pytest.raises(error, match=message):
+            UnloadOptions(**kwargs)
+
+    def test_unload_options_checked_against_format(self):
+        """Test format-dependent options are rejected for the wrong format"""
+        with pytest.raises(ValueError, match="cannot be used with parquet"):
+            UnloadOptions(compression="bzip2").clauses("parquet")
+        with pytest.raises(ValueError, match="only be used with parquet"):
+            UnloadOptions(row_group_size_mb=64).clauses("csv")
+        assert UnloadOptions(row_group_size_mb=64).clauses("parquet").strip() == "ROWGROUPSIZE 64 MB"
+
+
+class TestUnloadPlanner:
+    """Test cases for EXPLAIN-driven UNLOAD tuning"""
+
+    def test_small_result_is_one_file(self):
+        """Test a small result is not scattered over every slice"""
+        plan = redshift_utils._plan_unload(rows=10_000, width=100, file_format="parquet", num_slices=32)
+
+        assert not plan.parallel
+        assert plan.expected_files == 1
+        assert plan.row_group_size_mb == 32
+        assert not plan.gzip
+
+    def test_large_result_is_split_over_slices(self):
+        """Test a large result is written in parallel and capped at the target file size"""
+        plan = redshift_utils._plan_unload(rows=500_000_000, width=200, file_format="csv", num_slices=16)
+
+        assert plan.parallel
+        assert plan.gzip
+        assert plan.max_file_size_mb == redshift_utils.UNLOAD_TARGET_FILE_MB
+        assert plan.row_group_size_mb is None
+        # 100 GB is about 25 GB after GZIP: 1.56 GB per slice, in six files of at most 256 MB
+        assert plan.expected_files == 16 * 6
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_auto_tune_sets_unload_options(self, mock_get_session, mock_boto_session):
+        """Test auto_tune turns the EXPLAIN estimate into UNLOAD clauses"""
+        mock_redshift_client = Mock()
+        mock_s3_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
+            'redshift-data': mock_redshift_client,
+            's3': mock_s3_client
+        }[service]
+        mock_boto_session.return_value = mock_session_instance
+        mock_redshift_client.execute_statement.return_value = {"Id": "id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 1000}
+        mock_redshift_client.get_statement_result.side_effect = [
+            {"Records": [[{"stringValue": "XN Seq Scan on t  (cost=0.00..1.00 rows=1000 width=50)"}]]},
+            {"Records": [[{"longValue": 8}]]},
+        ]
+        mock_s3_client.list_objects_v2.return_value = {"Contents": [{"Key": "x", "Size": 1}]}
+
+        unload_redshift("SELECT * FROM t WHERE a = ''x''", "s3://bucket/out/", "db", "cluster", "user", "role",
+                        file_format="parquet", auto_tune=True, verbose=0)
+
+        sqls = [c[1]["Sql"] for c in mock_redshift_client.execute_statement.call_args_list]
+        assert sqls[0] == "EXPLAIN SELECT * FROM t WHERE a = 'x'"
+        assert "PARALLEL FALSE" in sqls[-1]
+        assert "MAXFILESIZE 256 MB" in sqls[-1]
+        assert "ROWGROUPSIZE 32 MB" in sqls[-1]
+
+
+class TestVerifyS3Files:
+    """Test cases for manifest-based UNLOAD verification"""
+
+    @staticmethod
+    def _s3(objects, manifest=None):
+        """Mock S3 client that lists objects one per page, honouring Delimiter"""
+        if manifest is not None:
+            objects = {**objects, "out/manifest": 10}
+
+        def paginate(Bucket, Prefix, Delimiter=None):
+            keys = sorted(k for k in objects if k.startswith(Prefix))
+            sub_prefixes = set()
+            for key in keys:
+                rest = key[len(Prefix):]
+                if Delimiter and Delimiter in rest:
+                    sub_prefixes.add(Prefix + rest.split(Delimiter)[0] + Delimiter)
+                else:
+                    yield {"Contents": [{"Key": key, "Size": objects[key]}]}
+            for sub_prefix in sorted(sub_prefixes):
+                yield {"CommonPrefixes": [{"Prefix": sub_prefix}]}
+
+        s3 = Mock()
+        s3.get_paginator.return_value.paginate.side_effect = paginate
+        s3.get_object.return_value = {"Body": io.BytesIO(json.dumps(manifest or {}).encode())}
+        return s3
+
+    def test_listing_covers_every_page_and_partition(self):
+        """Test files are found across pages and partition prefixes"""
+        objects = {f"out/day={d}/000{i}_part_00.parquet": 100 for d in range(3) for i in range(4)}
+        objects["out/extra_part_00.parquet"] = 50
+
+        result = verify_s3_files("s3://bucket/out/", self._s3(objects), verbose=0)
+
+        assert result.file_count == 13
+        assert result.total_bytes == 1250
+        assert result.manifest_key is None
+        assert result.complete
+
+    def test_manifest_rows_and_sizes_are_checked(self):
+        """Test a verbose manifest is compared with the listing and Redshift's row count"""
+        objects = {"out/0000_part_00": 100, "out/0001_part_00": 200}
+        manifest = {"entries": [
+            {"url": "s3://bucket/out/0000_part_00", "meta": {"content_length": 100, "record_count": 7}},
+            {"url": "s3://bucket/out/0001_part_00", "meta": {"content_length": 200, "record_count": 5}},
+        ]}
+
+        result = verify_s3_files("s3://bucket/out/", self._s3(objects, manifest), verbose=0, expected_rows=12)
+
+        assert result.manifest_key == "out/manifest"
+        assert result.files == objects
+        assert result.row_count == 12
+        assert result.complete
+
+    def test_incomplete_output_is_reported(self):
+        """Test missing files, wrong sizes and row count differences make the result incomplete"""
+        objects = {"out/0000_part_00": 90}
+        manifest = {"entries": [
+            {"url": "s3://bucket/out/0000_part_00", "meta": {"content_length": 100, "record_count": 7}},
+            {"url": "s3://bucket/out/0001_part_00", "meta": {"content_length": 200, "record_count": 5}},
+        ]}
+
+        result = verify_s3_files("s3://bucket/out/", self._s3(objects, manifest), verbose=0, expected_rows=12)
+
+        assert result.missing == ["out/0001_part_00"]
+        assert result.size_mismatches == ["out/0000_part_00"]
+        assert not result.complete
+
+
+class TestReadRedshift:
+    """Test cases for read_redshift function"""
+
+    @staticmethod
+    def _mock_clients(mock_boto_session, objects):
+        mock_redshift_client = Mock()
+        mock_s3_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
+            'redshift-data': mock_redshift_client,
+            's3': mock_s3_client
+        }[service]
+        mock_boto_session.return_value = mock_session_instance
+
+        mock_redshift_client.execute_statement.return_value = {"Id": "unload-id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 1000}
+
+        def paginate(Bucket, Prefix):
+            return [{"Contents": [{"Key": Prefix + name, "Size": len(body)} for name, body in objects.items()]}]
+
+        mock_s3_client.get_paginator.return_value.paginate.side_effect = paginate
+        mock_s3_client.list_objects_v2.return_value = {"Contents": [{"Key": "x", "Size": 1}]}
+        mock_s3_client.get_object.side_effect = lambda Bucket, Key: {
+            "Body": Mock(read=Mock(return_value=objects[Key.rsplit("/", 1)[1]]))
+        }
+        return mock_redshift_client, mock_s3_client
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_read_joins_parts_and_cleans_up(self, mock_get_session, mock_boto_session):
+        """Test all UNLOAD parts are read into one DataFrame and then deleted"""
+        objects = {}
+        for i, values in enumerate([[1, 2], [3], [4, 5, 6]]):
+            buffer = io.BytesIO()
+            pl.DataFrame({"id": values}).write_parquet(buffer)
+            objects[f"{i:04d}_part_00.parquet"] = buffer.getvalue()
+        mock_redshift_client, mock_s3_client = self._mock_clients(mock_boto_session, objects)
+
+        df = read_redshift(
+            query="SELECT id FROM t",
+            s3_bucket="test-bucket",
+            db="db",
+            cluster_id="cluster",
+            db_user="user",
+            role="role",
+            method="unload",
+            verbose=0
+        )
+
+        assert df["id"].to_list() == [1, 2, 3, 4, 5, 6]
+        sql = mock_redshift_client.execute_statement.call_args[1]['Sql']
+        assert "format as parquet" in sql
+        assert "to 's3://test-bucket/temp_reads/" in sql
+        deleted = mock_s3_client.delete_objects.call_args[1]['Delete']['Objects']
+        assert len(deleted) == 3
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_empty_result(self, mock_get_session, mock_boto_session):
+        """Test a query without rows gives an empty DataFrame"""
+        mock_redshift_client, mock_s3_client = self._mock_clients(mock_boto_session, {})
+
+        df = read_redshift("SELECT 1 WHERE FALSE", "test-bucket", "db", "cluster", "user", "role",
+                           method="unload", verbose=0)
+
+        assert df.is_empty()
+        mock_s3_client.get_object.assert_not_called()
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_failed_unload_raises_and_cleans_up(self, mock_get_session, mock_boto_session):
+        """Test a failed UNLOAD raises and removes partial output"""
+        mock_redshift_client, mock_s3_client = self._mock_clients(mock_boto_session, {"0000_part_00.parquet": b""})
+        mock_redshift_client.describe_statement.return_value = {"Status": "FAILED", "Error": "boom"}
+
+        with pytest.raises(Exception, match="UNLOAD failed"):
+            read_redshift("SELECT 1", "test-bucket", "db", "cluster", "user", "role", method="unload", verbose=0)
+
+        mock_s3_client.get_object.assert_not_called()
+        mock_s3_client.delete_object.assert_called_once()
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_auto_falls_back_to_unload_when_fetch_is_rejected(self, mock_get_session, mock_boto_session):
+        """Test an underestimated result too large for the Data API is read with UNLOAD"""
+        buffer = io.BytesIO()
+        pl.DataFrame({"id": [1, 2]}).write_parquet(buffer)
+        mock_redshift_client, mock_s3_client = self._mock_clients(
+            mock_boto_session, {"0000_part_00.parquet": buffer.getvalue()})
+        mock_redshift_client.get_statement_result.side_effect = [
+            {"Records": [[{"stringValue": "XN Seq Scan on t  (cost=0.00..0.10 rows=10 width=8)"}]]},
+            redshift_utils.ClientError({"Error": {"Code": "ValidationException",
+                                                  "Message": "Query result exceeds the limit"}},
+                                       "GetStatementResult"),
+        ]
+
+        df = read_redshift("SELECT id FROM t", "test-bucket", "db", "cluster", "user", "role", verbose=0)
+
+        assert df["id"].to_list() == [1, 2]
+        sqls = [c[1]["Sql"] for c in mock_redshift_client.execute_statement.call_args_list]
+        assert sqls[1] == "SELECT id FROM t"
+        assert "format as parquet" in sqls[2]
+
+
+class TestFetchRedshift:
+    """Test cases for direct Data API result fetching"""
+
+    COLUMNS = [
+        {"name": "id", "typeName": "int8"},
+        {"name": "score", "typeName": "float8"},
+        {"name": "ok", "typeName": "bool"},
+        {"name": "day", "typeName": "date"},
+        {"name": "at", "typeName": "timestamp"},
+        {"name": "amount", "typeName": "numeric", "precision": 10, "scale": 2},
+        {"name": "name", "typeName": "varchar"},
+    ]
+
+    @staticmethod
+    def _mock_client(mock_boto_session):
+        mock_redshift_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.return_value = mock_redshift_client
+        mock_boto_session.return_value = mock_session_instance
+        mock_redshift_client.execute_statement.return_value = {"Id": "query-id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 1000}
+        return mock_redshift_client
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_fetch_pages_and_decodes_types(self, mock_get_session, mock_boto_session):
+        """Test every result page is decoded into typed columns"""
+        mock_redshift_client = self._mock_client(mock_boto_session)
+        row = [{"longValue": 1}, {"doubleValue": 0.5}, {"booleanValue": True}, {"stringValue": "2024-01-02"},
+               {"stringValue": "2024-01-02 03:04:05.5"}, {"stringValue": "12.50"}, {"stringValue": "a"}]
+        nulls = [{"isNull": True}] * 7
+        mock_redshift_client.get_statement_result.side_effect = [
+            {"ColumnMetadata": self.COLUMNS, "Records": [row], "NextToken": "t"},
+            {"ColumnMetadata": self.COLUMNS, "Records": [nulls]},
+        ]
+
+        df = fetch_redshift("SELECT * FROM t", "db", "cluster", "user", verbose=0)
+
+        assert df.schema["id"] == pl.Int64
+        assert df.schema["amount"] == pl.Decimal(10, 2)
+        assert df.row(0) == (1, 0.5, True, date(2024, 1, 2), datetime(2024, 1, 2, 3, 4, 5, 500000),
+                             Decimal("12.50"), "a")
+        assert df.row(1) == (None,) * 7
+        assert mock_redshift_client.get_statement_result.call_args_list[1][1] == {"Id": "query-id", "NextToken": "t"}
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_auto_fetches_small_results(self, mock_get_session, mock_boto_session):
+        """Test read picks the direct path when EXPLAIN estimates a small result"""
+        mock_redshift_client = self._mock_client(mock_boto_session)
+        mock_redshift_client.get_statement_result.side_effect = [
+            {"Records": [[{"stringValue": "XN Seq Scan on t  (cost=0.00..0.10 rows=10 width=8)"}]]},
+            {"ColumnMetadata": self.COLUMNS[:1], "Records": [[{"longValue": 7}]]},
+        ]
+
+        df = read_redshift("SELECT id FROM t WHERE name = ''a''", "test-bucket", "db", "cluster", "user", "role",
+                           verbose=0)
+
+        assert df["id"].to_list() == [7]
+        sqls = [c[1]["Sql"] for c in mock_redshift_client.execute_statement.call_args_list]
+        assert sqls == ["EXPLAIN SELECT id FROM t WHERE name = 'a'", "SELECT id FROM t WHERE name = 'a'"]
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_fetch_reports_timeout(self, mock_get_session, mock_boto_session):
+        """Test a query still running at the deadline raises a timeout, not a failure"""
+        mock_redshift_client = self._mock_client(mock_boto_session)
+        mock_redshift_client.describe_statement.return_value = {"Status": "STARTED"}
+
+        with pytest.raises(TimeoutError, match="did not finish within 0 minutes"):
+            fetch_redshift("SELECT 1", "db", "cluster", "user", verbose=0, max_wait_minutes=0)
+
+
+class TestQueryCache:
+    """Test cases for the local query result cache"""
+
+    def test_key_ignores_formatting(self):
+        """Test whitespace and semicolons outside literals do not change the key"""
+        cache = QueryCache.__new__(QueryCache)
+
+        assert cache.key("SELECT *\n  FROM t WHERE a = ''x'';", db="db") == cache.key("SELECT * FROM t WHERE a = ''x''", db="db")
+        assert cache.key("SELECT * FROM t WHERE a = ''x  y''") != cache.key("SELECT * FROM t WHERE a = ''x y''")
+        assert cache.key("SELECT 1", db="a") != cache.key("SELECT 1", db="b")
+
+    @pytest.mark.parametrize("file_format", ["ipc", "parquet"])
+    def test_round_trip_and_ttl(self, tmp_path, file_format):
+        """Test stored results come back until they expire"""
+        cache = QueryCache(str(tmp_path), ttl_seconds=60, file_format=file_format)
+        df = pl.DataFrame({"id": [1, 2], "name": ["a", "b"]})
+        cache.put("k", df)
+
+        assert cache.get("k").equals(df)
+        with patch('redshift_utils.time.time', return_value=redshift_utils.time.time() + 61):
+            assert cache.get("k") is None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted past max_bytes"""
+        df = pl.DataFrame({"id": list(range(1000))})
+        df.write_ipc(tmp_path / "probe.bin")
+        entry_size = (tmp_path / "probe.bin").stat().st_size
+        os.unlink(tmp_path / "probe.bin")
+
+        cache = QueryCache(str(tmp_path), max_bytes=2 * entry_size)
+        cache.put("a", df)
+        os.utime(tmp_path / "a.arrow", (1, 1))
+        cache.put("b", df)
+        os.utime(tmp_path / "b.arrow", (2, 2))
+        cache.get("a")  # a is now the most recently used
+        cache.put("c", df)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_stale_table_versions_miss(self, tmp_path):
+        """Test an entry is dropped once its source tables changed"""
+        cache = QueryCache(str(tmp_path))
+        cache.put("k", pl.DataFrame({"id": [1]}), table_versions=[["public.t", 10, "2024-01-01"]])
+
+        assert cache.get("k", [["public.t", 10, "2024-01-01"]]) is not None
+        assert cache.get("k", [["public.t", 11, "2024-01-02"]]) is None
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_read_uses_cache(self, mock_get_session, mock_boto_session, tmp_path):
+        """Test a repeated read is served without running the query"""
+        buffer = io.BytesIO()
+        pl.DataFrame({"id": [1, 2]}).write_parquet(buffer)
+        mock_redshift_client, mock_s3_client = TestReadRedshift._mock_clients(
+            mock_boto_session, {"0000_part_00.parquet": buffer.getvalue()})
+        cache = QueryCache(str(tmp_path))
+
+        first = read_redshift("SELECT id FROM t", "test-bucket", "db", "cluster", "user", "role",
+                              cache=cache, method="unload", verbose=0)
+        second = read_redshift("SELECT id\nFROM t;", "test-bucket", "db", "cluster", "user", "role",
+                               cache=cache, method="unload", verbose=0)
+
+        assert second.equals(first)
+        mock_redshift_client.execute_statement.assert_called_once()
+
+        # Another database user may see different rows, so it does not share the entry
+        read_redshift("SELECT id FROM t", "test-bucket", "db", "cluster", "other_user", "role",
+                      cache=cache, method="unload", verbose=0)
+        assert mock_redshift_client.execute_statement.call_count == 2
+
+    def test_referenced_tables(self):
+        """Test source tables are found in a query, skipping WITH names"""
+        sql = redshift_utils._normalize_sql(
+            "WITH recent AS (SELECT * FROM events) SELECT * FROM recent JOIN analytics.users u ON u.id = recent.uid")
+
+        assert redshift_utils._referenced_tables(sql) == ["analytics.users", "public.events"]
+
+    def test_referenced_tables_follows_comma_joins_and_skips_functions(self):
+        """Test comma-joined tables are found and FROM inside EXTRACT is not taken as a table"""
+        sql = redshift_utils._normalize_sql(
+            "SELECT EXTRACT(year FROM created_at) FROM orders o, (SELECT * FROM items) i, public.customers c "
+            "WHERE o.id = i.order_id")
+
+        assert redshift_utils._referenced_tables(sql) == ["public.customers", "public.items", "public.orders"]
+
+
+class TestIterRedshiftBatches:
+    """Test cases for iter_redshift_batches"""
+
+    @staticmethod
+    def _parts(n_files, rows_per_file=2, row_group_size=None):
+        objects = {}
+        for i in range(n_files):
+            buffer = io.BytesIO()
+            df = pl.DataFrame({"id": list(range(i * rows_per_file, (i + 1) * rows_per_file))})
+            df.write_parquet(buffer, row_group_size=row_group_size)
+            objects[f"{i:04d}_part_00.parquet"] = buffer.getvalue()
+        return objects
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_yields_one_frame_per_file_with_bounded_prefetch(self, mock_get_session, mock_boto_session):
+        """Test batches arrive in file order with at most `prefetch` downloads ahead"""
+        mock_redshift_client, mock_s3_client = TestReadRedshift._mock_clients(mock_boto_session, self._parts(6))
+
+        batches = iter_redshift_batches("SELECT id FROM t", "test-bucket", "db", "cluster", "user", "role",
+                                        prefetch=2, verbose=0)
+        first = next(batches)
+
+        assert first["id"].to_list() == [0, 1]
+        # The first file plus the two queued behind it
+        assert mock_s3_client.get_object.call_count <= 3
+        rest = list(batches)
+        assert [df["id"][0] for df in rest] == [2, 4, 6, 8, 10]
+        assert len(mock_s3_client.delete_objects.call_args[1]['Delete']['Objects']) == 6
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_closing_early_cleans_up(self, mock_get_session, mock_boto_session):
+        """Test abandoning the iterator still deletes the UNLOAD files"""
+        mock_redshift_client, mock_s3_client = TestReadRedshift._mock_clients(mock_boto_session, self._parts(5))
+
+        batches = iter_redshift_batches("SELECT id FROM t", "test-bucket", "db", "cluster", "user", "role",
+                                        prefetch=1, verbose=0)
+        next(batches)
+        batches.close()
+
+        assert mock_s3_client.get_object.call_count <= 2
+        assert len(mock_s3_client.delete_objects.call_args[1]['Delete']['Objects']) == 5
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_by_row_group(self, mock_get_session, mock_boto_session):
+        """Test each Parquet row group becomes its own batch"""
+        pytest.importorskip("pyarrow")
+        TestReadRedshift._mock_clients(mock_boto_session, self._parts(2, rows_per_file=4, row_group_size=2))
+
+        batches = list(iter_redshift_batches("SELECT id FROM t", "test-bucket", "db", "cluster", "user", "role",
+                                             by_row_group=True, verbose=0))
+
+        assert [df["id"].to_list() for df in batches] == [[0, 1], [2, 3], [4, 5], [6, 7]]
+
+
+class TestScanRedshift:
+    """Test cases for scan_redshift pushdown"""
+
+    SCHEMA = {"id": pl.Int64, "name": pl.Utf8, "day": pl.Date}
+
+    @contextmanager
+    def _scan(self, rows, source="analytics.events"):
+        client = RedshiftClient()
+        queries = []
+
+        def read(query, *args, **kwargs):
+            queries.append(query)
+            return rows
+
+        with patch.object(client, "_query_schema", return_value=dict(self.SCHEMA)):
+            with patch.object(client, "read", side_effect=read):
+                lf = client.scan(source, "test-bucket", "db", "cluster", "user", "role", verbose=0)
+                yield lf, queries
+
+    def test_filter_and_select_are_pushed_down(self):
+        """Test translatable filters and projections end up in the UNLOAD query"""
+        rows = pl.DataFrame({"id": [2, 3], "name": ["o'neil", "b"]})
+        with self._scan(rows) as (lf, queries):
+            df = lf.filter((pl.col("id") > 1) & (pl.col("name") != "x")).select("id", "name").collect()
+
+        assert df["id"].to_list() == [2, 3]
+        assert len(queries) == 1
+        assert queries[0].startswith('SELECT "id", "name" FROM analytics.events WHERE')
+        assert '"id" > 1' in queries[0]
+        # Quotes are doubled for the UNLOAD string
+        assert "\"name\" <> ''x''" in queries[0]
+
+    def test_untranslatable_filter_is_applied_locally(self):
+        """Test filters without SQL form still filter the result"""
+        rows = pl.DataFrame({"id": [1, 2, 3], "name": ["a", "bb", "ccc"]})
+        with self._scan(rows, "SELECT * FROM analytics.events") as (lf, queries):
+            df = lf.filter(pl.col("name").str.len_chars() > 1).select("name").collect()
+
+        assert df["name"].to_list() == ["bb", "ccc"]
+        assert "FROM (SELECT * FROM analytics.events) AS scan_source" in queries[0]
+        assert "WHERE" not in queries[0]
+
+    def test_head_is_pushed_down_as_limit(self):
+        """Test a row limit becomes a nested LIMIT and empty results keep the schema"""
+        with self._scan(pl.DataFrame()) as (lf, queries):
+            df = lf.head(5).collect()
+
+        assert df.schema == pl.Schema(self.SCHEMA)
+        assert queries[0].endswith("LIMIT 5")
+
+    def test_predicate_translation(self):
+        """Test which predicates translate exactly to SQL"""
+        sql, exact = redshift_utils._predicate_to_sql(
+            pl.col("day").is_between(date(2024, 1, 1), date(2024, 2, 1)) | pl.col("id").is_in([1, 2]))
+        assert exact
+        assert sql == """("day" >= DATE '2024-01-01' AND "day" <= DATE '2024-02-01') OR ("id" IN (1, 2))"""
+
+        sql, exact = redshift_utils._predicate_to_sql(
+            (pl.col("id") == 1) & pl.col("name").str.contains("x"))
+        assert (sql, exact) == ('("id" = 1)', False)
+
+
 class TestCopyToRedshift:
     """Test cases for copy_to_redshift function"""
     
@@ -158,7 +783,7 @@ class TestCopyToRedshift:
         mock_redshift_client = Mock()
         mock_s3_client = Mock()
         mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: {
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
             'redshift-data': mock_redshift_client,
             's3': mock_s3_client
         }[service]
@@ -181,7 +806,8 @@ class TestCopyToRedshift:
             cluster_id="test-cluster",
             db_user="test-user",
             role="arn:aws:iam::123456789012:role/test-role",
-            verbose=0
+            verbose=0,
+            stage_format="csv"
         )
         
         # Verify S3 upload was called
@@ -210,17 +836,14 @@ class TestCopyToRedshift:
         mock_redshift_client = Mock()
         mock_s3_client = Mock()
         mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: {
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
             'redshift-data': mock_redshift_client,
             's3': mock_s3_client
         }[service]
         mock_boto_session.return_value = mock_session_instance
         
-        # Mock responses for both truncate and copy operations
-        mock_redshift_client.execute_statement.side_effect = [
-            {"Id": "truncate-id"},  # First call for TRUNCATE
-            {"Id": "copy-id"}       # Second call for COPY
-        ]
+        # TRUNCATE and COPY go out as one transaction
+        mock_redshift_client.batch_execute_statement.return_value = {"Id": "batch-id"}
         mock_redshift_client.describe_statement.return_value = {
             "Status": "FINISHED",
             "Duration": 100000
@@ -240,104 +863,1412 @@ class TestCopyToRedshift:
             verbose=0
         )
         
-        # Verify truncate was called first
-        first_sql = mock_redshift_client.execute_statement.call_args_list[0][1]['Sql']
-        assert "TRUNCATE TABLE test_schema.test_table" in first_sql
+        mock_redshift_client.execute_statement.assert_not_called()
+        mock_redshift_client.batch_execute_statement.assert_called_once()
+        sqls = mock_redshift_client.batch_execute_statement.call_args[1]['Sqls']
+        
+        # Verify the table is emptied first, atomically with the load
+        assert sqls[0] == "DELETE FROM test_schema.test_table;"
         
         # Verify copy was called second
-        second_sql = mock_redshift_client.execute_statement.call_args_list[1][1]['Sql']
-        assert "COPY test_schema.test_table" in second_sql
+        assert "COPY test_schema.test_table" in sqls[1]
+        assert len(sqls) == 2
+        mock_redshift_client.describe_statement.assert_called_once_with(Id="batch-id")
 
-
-class TestCopyS3ToRedshift:
-    """Test cases for copy_s3_to_redshift function"""
-    
-    def test_missing_credentials_raises_error(self):
-        """Test that missing credentials raise ValueError"""
-        with pytest.raises(ValueError, match="All credential parameters"):
-            copy_s3_to_redshift(
-                s3_uri="s3://bucket/file.csv",
-                table_name="test_table",
-                schema="test_schema",
-                db=None,  # None value
-                cluster_id="cluster",
-                db_user="user",
-                role="role"
-            )
-    
     @patch('redshift_utils.boto3.Session')
     @patch('redshift_utils.s.get_session')
-    def test_copy_from_s3_csv(self, mock_get_session, mock_boto_session):
-        """Test copying CSV file from S3"""
-        # Mock boto3 clients
+    def test_copy_with_replace_swaps_in_new_table(self, mock_get_session, mock_boto_session):
+        """Test replace builds a shadow table from the schema and swaps it in"""
+        df = pl.DataFrame({"id": [1, 2, 3], "name": ["a", "bb", "ccc"]})
+
         mock_redshift_client = Mock()
+        mock_s3_client = Mock()
         mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_redshift_client
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
+            'redshift-data': mock_redshift_client,
+            's3': mock_s3_client
+        }[service]
         mock_boto_session.return_value = mock_session_instance
-        
-        # Mock responses
-        mock_redshift_client.execute_statement.return_value = {"Id": "copy-id"}
-        mock_redshift_client.describe_statement.return_value = {
-            "Status": "FINISHED",
-            "Duration": 2000000
-        }
-        
-        # Execute function
-        copy_s3_to_redshift(
-            s3_uri="s3://test-bucket/data/file.csv",
+
+        mock_redshift_client.batch_execute_statement.return_value = {"Id": "batch-id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 100000}
+
+        copy_to_redshift(
+            df=df,
             table_name="test_table",
             schema="test_schema",
-            db="test_db",
-            cluster_id="test-cluster",
-            db_user="test-user",
-            role="arn:aws:iam::123456789012:role/test-role",
-            file_format="csv",
+            s3_bucket="test-bucket",
+            db="db",
+            cluster_id="cluster",
+            db_user="user",
+            role="role",
+            if_exists="replace",
+            dist_key="id",
+            sort_key="id",
             verbose=0
         )
-        
-        # Verify COPY command
-        sql = mock_redshift_client.execute_statement.call_args[1]['Sql']
-        assert "COPY test_schema.test_table" in sql
-        assert "FROM 's3://test-bucket/data/file.csv'" in sql
-        assert "FORMAT AS CSV" in sql
-        assert "DELIMITER ','" in sql
-        assert "IGNOREHEADER 1" in sql
-    
+
+        sqls = mock_redshift_client.batch_execute_statement.call_args[1]['Sqls']
+        assert len(sqls) == 4
+        shadow = sqls[0].split()[2]
+        assert shadow.startswith("test_schema.test_table__shadow_")
+        assert 'DISTKEY ("id")' in sqls[0]
+        assert f"COPY {shadow}" in sqls[1]
+        assert sqls[2] == "DROP TABLE IF EXISTS test_schema.test_table;"
+        assert sqls[3] == f"ALTER TABLE {shadow} RENAME TO test_table;"
+        # The new table gets statistics and encodings from its first load
+        assert "COMPUPDATE ON" in sqls[1] and "STATUPDATE ON" in sqls[1]
+
     @patch('redshift_utils.boto3.Session')
     @patch('redshift_utils.s.get_session')
-    def test_copy_from_s3_parquet(self, mock_get_session, mock_boto_session):
-        """Test copying Parquet file from S3"""
-        # Mock setup
+    def test_copy_with_replace_keeps_given_encodings(self, mock_get_session, mock_boto_session):
+        """Test replace with column_encodings skips compression analysis"""
+        df = pl.DataFrame({"id": [1, 2, 3], "name": ["a", "bb", "ccc"]})
         mock_redshift_client = Mock()
         mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_redshift_client
+        mock_session_instance.client.side_effect = lambda service, **kwargs: {
+            'redshift-data': mock_redshift_client,
+            's3': Mock()
+        }[service]
         mock_boto_session.return_value = mock_session_instance
-        
-        mock_redshift_client.execute_statement.return_value = {"Id": "copy-id"}
-        mock_redshift_client.describe_statement.return_value = {
-            "Status": "FINISHED",
-            "Duration": 1500000
-        }
-        
-        # Execute with parquet format
-        copy_s3_to_redshift(
-            s3_uri="s3://test-bucket/data/file.parquet",
+        mock_redshift_client.batch_execute_statement.return_value = {"Id": "batch-id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 100000}
+
+        copy_to_redshift(
+            df=df,
             table_name="test_table",
             schema="test_schema",
+            s3_bucket="test-bucket",
             db="db",
             cluster_id="cluster",
             db_user="user",
             role="role",
-            file_format="parquet",
+            if_exists="replace",
+            column_encodings={"name": "LZO"},
             verbose=0
         )
-        
+
+        sqls = mock_redshift_client.batch_execute_statement.call_args[1]['Sqls']
+        assert "COMPUPDATE OFF" in sqls[1] and "STATUPDATE ON" in sqls[1]
+
+
+class TestCopyOptions:
+    """Test cases for the COPY parameters built from CopyOptions"""
+
+    def test_defaults_skip_compression_and_statistics(self):
+        """Test the defaults turn off COMPUPDATE and STATUPDATE only"""
+        clauses = redshift_utils.CopyOptions().clauses("parquet")
+
+        assert clauses.split() == ["COMPUPDATE", "OFF", "STATUPDATE", "OFF"]
+        assert redshift_utils.CopyOptions().column_list() == ""
+
+    def test_text_format_options(self):
+        """Test data conversion parameters and the column list"""
+        options = redshift_utils.CopyOptions(compupdate=None, statupdate=True, max_error=10,
+                                             truncate_columns=True, date_format="auto",
+                                             time_format="epochsecs", columns=["id", "name"])
+
+        clauses = options.clauses("csv")
+
+        assert "COMPUPDATE" not in clauses
+        assert "STATUPDATE ON" in clauses
+        assert "MAXERROR 10" in clauses
+        assert "TRUNCATECOLUMNS" in clauses
+        assert "DATEFORMAT 'auto'" in clauses
+        assert "TIMEFORMAT 'epochsecs'" in clauses
+        assert options.column_list() == ' ("id", "name")'
+
+    def test_conversion_options_rejected_for_parquet(self):
+        """Test Redshift-incompatible parameters fail before anything runs"""
+        with pytest.raises(ValueError, match="MAXERROR, DATEFORMAT cannot be used when loading parquet"):
+            redshift_utils.CopyOptions(max_error=5, date_format="auto").clauses("parquet")
+
+
+class TestCreateTableSql:
+    """Test cases for the table DDL generated by 'replace'"""
+
+    def test_column_types_and_encodings(self):
+        """Test polars dtypes map to Redshift types with sensible encodings"""
+        df = pl.DataFrame({
+            "id": pl.Series([1, 2], dtype=pl.Int32),
+            "amount": [1.5, 2.5],
+            "flag": [True, False],
+            "day": [date(2024, 1, 1), date(2024, 1, 2)],
+        })
+
+        sql = redshift_utils._create_table_sql(df, "s", "t", sort_key=["day", "id"], dist_style="even")
+
+        assert sql.startswith("CREATE TABLE s.t (")
+        assert '"id" INTEGER ENCODE AZ64' in sql
+        assert '"amount" DOUBLE PRECISION ENCODE ZSTD' in sql
+        assert '"flag" BOOLEAN ENCODE RAW' in sql
+        # Leading sort key column stays uncompressed
+        assert '"day" DATE ENCODE RAW' in sql
+        assert sql.endswith('DISTSTYLE EVEN\nSORTKEY ("day", "id");')
+
+    def test_varchar_sized_from_data(self):
+        """Test string columns are sized from their longest value in bytes"""
+        lf = pl.LazyFrame({"name": ["a", "é" * 10, None]})
+
+        sql = redshift_utils._create_table_sql(lf, "s", "t", column_encodings={"name": "LZO"})
+
+        assert '"name" VARCHAR(32) ENCODE LZO' in sql
+
+    def test_unknown_key_column_raises(self):
+        """Test keys must name DataFrame columns"""
+        df = pl.DataFrame({"id": [1]})
+
+        with pytest.raises(ValueError, match="'missing'"):
+            redshift_utils._create_table_sql(df, "s", "t", dist_key="missing")
+
+    def test_invalid_dist_style_raises(self):
+        """Test KEY without a dist_key and unknown styles are rejected before anything is staged"""
+        client = mock_client()
+        df = pl.DataFrame({"id": [1]})
+
+        with pytest.raises(ValueError, match="requires a dist_key"):
+            client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", if_exists="replace",
+                        dist_style="key", verbose=0)
+        with pytest.raises(ValueError, match="dist_style must be one of"):
+            redshift_utils._create_table_sql(df, "s", "t", dist_style="random")
+
+        client._s3.upload_file.assert_not_called()
+
+    @pytest.mark.parametrize("if_exists, copy_options, stage_format", [
+        ("replace", None, "parquet"),
+        ("append", None, "csv.gz"),
+        ("upsert", None, "csv.gz"),
+        ("replace", CopyOptions(max_error=5), "csv.gz"),
+    ])
+    def test_default_stage_format(self, if_exists, copy_options, stage_format):
+        """Test that only a table built from the frame is staged as Parquet by default"""
+        client = mock_client("copy-id", {"Status": "FINISHED", "Duration": 1000})
+        df = pl.DataFrame({"col1": [1, 2, 3], "col2": ["a", "b", "c"]})
+
+        uploaded = {}
+        client._s3.upload_file.side_effect = lambda path, bucket, key: uploaded.update(
+            key=key, df=pl.read_parquet(path) if key.endswith(".parquet") else pl.read_csv(path)
+        )
+
+        client.copy(df, "test_table", "test_schema", "test-bucket", "db", "cluster", "user", "role",
+                    if_exists=if_exists, upsert_keys="col1", copy_options=copy_options, verbose=0)
+
+        batch = client._redshift_data.batch_execute_statement.call_args
+        sqls = batch[1]['Sqls'] if batch else [client._redshift_data.execute_statement.call_args[1]['Sql']]
+        copy_sql = next(sql for sql in sqls if "COPY " in sql)
+        assert uploaded["key"].endswith(redshift_utils.STAGE_FORMATS[stage_format][0])
+        assert redshift_utils.STAGE_FORMATS[stage_format][1] in copy_sql
+        assert uploaded["df"].equals(df)
+
+    @pytest.mark.parametrize("stage_format, opener, clause", [
+        ("csv.gz", "gzip", "GZIP"),
+        ("csv.bz2", "bz2", "BZIP2"),
+    ])
+    def test_compressed_csv_stage_formats(self, tmp_path, stage_format, opener, clause):
+        """Test that compressed CSV stages decode back and get the matching COPY clause"""
+        df = pl.DataFrame({"col1": [1, 2, 3], "col2": ["a", None, "c"]})
+        path = str(tmp_path / f"stage{redshift_utils.STAGE_FORMATS[stage_format][0]}")
+
+        redshift_utils._write_stage_file(df, path, stage_format)
+
+        with {"gzip": gzip, "bz2": bz2}[opener].open(path, "rb") as f:
+            assert pl.read_csv(f).equals(df)
+        assert redshift_utils.STAGE_FORMATS[stage_format][1].endswith(clause)
+
+    def test_invalid_stage_format_raises_error(self):
+        """Test that an unknown stage_format is rejected before any upload"""
+        df = pl.DataFrame({"col1": [1]})
+        with pytest.raises(AssertionError, match="stage_format not valid"):
+            copy_to_redshift(
+                df=df, table_name="t", schema="s", s3_bucket="b",
+                db="db", cluster_id="cluster", db_user="user", role="role",
+                stage_format="xlsx"
+            )
+
+
+class TestSliceAlignedStaging:
+    """Test cases for multi-file, manifest-based staging"""
+
+    def test_plan_stage_parts(self):
+        """Test that large frames get a multiple of the slice count and small ones fewer files"""
+        min_rows = redshift_utils.MIN_ROWS_PER_STAGE_FILE
+        assert redshift_utils._plan_stage_parts(10, 16, 1) == 1
+        assert redshift_utils._plan_stage_parts(16 * min_rows, 16, 1) == 16
+        assert redshift_utils._plan_stage_parts(100 * min_rows, 16, 2) == 32
+        assert redshift_utils._plan_stage_parts(5 * min_rows, 16, 1) == 5
+
+    def test_split_frame_is_balanced_and_complete(self):
+        """Test that parts differ by at most one row and cover the frame in order"""
+        df = pl.DataFrame({"id": range(10)})
+        parts = list(redshift_utils._split_frame(df, 4))
+        assert [len(p) for p in parts] == [3, 3, 2, 2]
+        assert pl.concat(parts).equals(df)
+
+    @patch('redshift_utils.MIN_ROWS_PER_STAGE_FILE', 2)
+    def test_copy_uses_manifest_for_split_frames(self):
+        """Test that a split frame is uploaded in parts and loaded with COPY ... MANIFEST"""
+        client = mock_client("copy-id", {"Status": "FINISHED", "Duration": 1000})
+        df = pl.DataFrame({"id": range(20), "name": [f"n{i}" for i in range(20)]})
+
+        uploaded = {}
+        client._s3.upload_file.side_effect = lambda path, bucket, key: uploaded.update({key: pl.read_parquet(path)})
+
+        client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", num_slices=4,
+                    stage_format="parquet", verbose=0)
+
+        assert len(uploaded) == 4
+        assert pl.concat([uploaded[k] for k in sorted(uploaded)]).equals(df)
+        manifest = json.loads(client._s3.put_object.call_args[1]['Body'])
+        assert sorted(e["url"].split("bucket/")[1] for e in manifest["entries"]) == sorted(uploaded)
+        assert all(e["meta"]["content_length"] > 0 for e in manifest["entries"])
+
+        copy_sql = client._redshift_data.execute_statement.call_args[1]['Sql']
+        assert "manifest.json'" in copy_sql
+        assert "MANIFEST" in copy_sql.split("FORMAT AS PARQUET")[1]
+        deleted = client._s3.delete_objects.call_args[1]['Delete']['Objects']
+        assert len(deleted) == 5
+
+    @patch('redshift_utils.MIN_ROWS_PER_STAGE_FILE', 2)
+    def test_failed_upload_removes_temporary_files(self):
+        """Test that the local files of a failed multi-part stage are deleted"""
+        client = mock_client()
+        paths = []
+
+        def upload_file(path, bucket, key):
+            paths.append(path)
+            raise RuntimeError("upload failed")
+
+        client._s3.upload_file.side_effect = upload_file
+
+        with pytest.raises(RuntimeError, match="upload failed"):
+            client.copy(pl.DataFrame({"id": range(20)}), "t", "s", "bucket", "db", "cluster", "user", "role",
+                        num_slices=4, verbose=0)
+
+        assert paths
+        assert not any(os.path.exists(path) for path in paths)
+        client._redshift_data.batch_execute_statement.assert_not_called()
+
+    @patch('redshift_utils.MIN_ROWS_PER_STAGE_FILE', 2)
+    def test_slice_count_is_queried_once(self):
+        """Test that the slice count comes from STV_SLICES and is cached per cluster"""
+        client = mock_client("stmt", {"Status": "FINISHED", "Duration": 1000})
+        client._redshift_data.get_statement_result.return_value = {"Records": [[{"longValue": 2}]]}
+        df = pl.DataFrame({"id": range(8)})
+
+        for _ in range(2):
+            client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", verbose=0)
+
+        slice_queries = [c for c in client._redshift_data.execute_statement.call_args_list
+                         if "stv_slices" in c[1]['Sql']]
+        assert len(slice_queries) == 1
+        assert client._s3.upload_file.call_count == 4
+
+
+class FakeMultipartS3:
+    """In-memory stand-in for the S3 multipart upload calls"""
+
+    def __init__(self, fail_part=None):
+        self.objects = {}
+        self.parts = {}
+        self.aborted = []
+        self.fail_part = fail_part
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key):
+        self.parts[Key] = {}
+        return {"UploadId": f"upload-{Key}"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise RuntimeError("part failed")
+        self.parts[Key][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        assert numbers == sorted(numbers)
+        self.objects[Key] = b"".join(self.parts[Key][n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(Key)
+
+
+class TestStreamingStage:
+    """Test cases for zero-disk staging through S3 multipart uploads"""
+
+    @patch('redshift_utils.MIN_STREAM_PART_SIZE', 1)
+    def test_writer_splits_into_parts(self):
+        """Test that writes are cut into fixed-size parts and reassembled in order"""
+        s3 = FakeMultipartS3()
+        with redshift_utils._S3MultipartWriter(s3, "bucket", "key", part_size=10) as writer:
+            for chunk in (b"a" * 7, b"b" * 7, b"c" * 11):
+                writer.write(chunk)
+
+        assert [len(p) for _, p in sorted(s3.parts["key"].items())] == [10, 10, 5]
+        assert s3.objects["key"] == b"a" * 7 + b"b" * 7 + b"c" * 11
+        assert writer.bytes_written == 25
+
+    def test_small_object_uses_put_object(self):
+        """Test that objects below one part skip the multipart protocol"""
+        s3 = FakeMultipartS3()
+        with redshift_utils._S3MultipartWriter(s3, "bucket", "key") as writer:
+            writer.write(b"tiny")
+
+        assert s3.objects["key"] == b"tiny"
+        assert s3.parts == {}
+
+    @patch('redshift_utils.MIN_STREAM_PART_SIZE', 1)
+    def test_failed_part_aborts_upload(self):
+        """Test that a failed part aborts the multipart upload instead of completing it"""
+        s3 = FakeMultipartS3(fail_part=2)
+        with pytest.raises(RuntimeError, match="part failed"):
+            with redshift_utils._S3MultipartWriter(s3, "bucket", "key", part_size=4) as writer:
+                for _ in range(10):
+                    writer.write(b"data")
+
+        assert s3.aborted == ["key"]
+        assert "key" not in s3.objects
+
+    @patch('redshift_utils.MIN_STREAM_PART_SIZE', 1)
+    @patch('tempfile.NamedTemporaryFile', side_effect=AssertionError("no local files in stream mode"))
+    def test_copy_stream_mode_writes_no_local_files(self, mock_temp_file):
+        """Test that stage_mode='stream' serializes straight into S3"""
+        client = mock_client("copy-id", {"Status": "FINISHED", "Duration": 1000})
+        client._s3 = FakeMultipartS3()
+        client._s3.delete_object = Mock()
+        df = pl.DataFrame({"id": range(1000), "name": [f"name-{i}" for i in range(1000)]})
+
+        client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role",
+                    stage_format="csv.gz", stage_mode="stream", stream_part_size=1024, verbose=0)
+
+        (key, body), = client._s3.objects.items()
+        assert key.endswith(".csv.gz")
+        assert len(client._s3.parts[key]) > 1
+        assert pl.read_csv(gzip.decompress(body)).equals(df)
+        assert "GZIP" in client._redshift_data.execute_statement.call_args[1]['Sql']
+
+    def test_avro_stream_mode_is_rejected(self):
+        """Test that Avro, which polars writes in one piece, cannot be streamed"""
+        client = mock_client()
+        client._s3 = FakeMultipartS3()
+
+        with pytest.raises(ValueError, match="avro"):
+            client.copy(pl.DataFrame({"id": [1]}), "t", "s", "bucket", "db", "cluster", "user", "role",
+                        stage_format="avro", stage_mode="stream", verbose=0)
+
+        assert client._s3.objects == {}
+        client._redshift_data.execute_statement.assert_not_called()
+
+
+class TestLazyFrameCopy:
+    """Test cases for staging polars LazyFrames in streaming batches"""
+
+    def test_lazyframe_is_staged_batch_by_batch(self):
+        """Test that each batch becomes one part file loaded through one manifest COPY"""
+        client = mock_client("copy-id", {"Status": "FINISHED", "Duration": 1000})
+        uploaded = {}
+        client._s3.upload_file.side_effect = lambda path, bucket, key: uploaded.update({key: pl.read_parquet(path)})
+        lf = pl.LazyFrame({"id": range(25)}).with_columns((pl.col("id") * 2).alias("double"))
+
+        client.copy(lf, "t", "s", "bucket", "db", "cluster", "user", "role", batch_size=10,
+                    stage_format="parquet", verbose=0)
+
+        assert [len(uploaded[k]) for k in sorted(uploaded)] == [10, 10, 5]
+        assert pl.concat([uploaded[k] for k in sorted(uploaded)]).equals(lf.collect())
+        manifest = json.loads(client._s3.put_object.call_args[1]['Body'])
+        assert len(manifest["entries"]) == 3
+        copy_sql = client._redshift_data.execute_statement.call_args[1]['Sql']
+        assert "manifest.json'" in copy_sql
+        assert "MANIFEST" in copy_sql
+        # Slice count is never needed for lazy input
+        assert not any("stv_slices" in c[1]['Sql'] for c in client._redshift_data.execute_statement.call_args_list)
+
+    def test_empty_lazyframe_stages_one_empty_file(self):
+        """Test that an empty result still gives COPY a valid input"""
+        client = mock_client("copy-id", {"Status": "FINISHED", "Duration": 1000})
+        lf = pl.LazyFrame({"id": [1, 2]}).filter(pl.col("id") > 5)
+
+        client.copy(lf, "t", "s", "bucket", "db", "cluster", "user", "role", verbose=0)
+
+        client._s3.upload_file.assert_called_once()
+        manifest = json.loads(client._s3.put_object.call_args[1]['Body'])
+        assert len(manifest["entries"]) == 1
+
+    def test_batches_without_collect_batches(self):
+        """Test the slice-by-slice fallback for polars versions without collect_batches"""
+        class OldLazyFrame:
+            def __init__(self, lf):
+                self.lf = lf
+
+            def slice(self, offset, length):
+                return self.lf.slice(offset, length)
+
+        lf = pl.LazyFrame({"id": range(7)})
+        batches = list(redshift_utils._iter_lazy_batches(OldLazyFrame(lf), 3))
+
+        assert [len(b) for b in batches] == [3, 3, 1]
+        assert pl.concat(batches).equals(lf.collect())
+
+
+class TestCopyS3ToRedshift:
+    """Test cases for copy_s3_to_redshift function"""
+    
+    def test_missing_credentials_raises_error(self):
+        """Test that missing credentials raise ValueError"""
+        with pytest.raises(ValueError, match="All credential parameters"):
+            copy_s3_to_redshift(
+                s3_uri="s3://bucket/file.csv",
+                table_name="test_table",
+                schema="test_schema",
+                db=None,  # None value
+                cluster_id="cluster",
+                db_user="user",
+                role="role"
+            )
+    
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_copy_from_s3_csv(self, mock_get_session, mock_boto_session):
+        """Test copying CSV file from S3"""
+        # Mock boto3 clients
+        mock_redshift_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.return_value = mock_redshift_client
+        mock_boto_session.return_value = mock_session_instance
+        
+        # Mock responses
+        mock_redshift_client.execute_statement.return_value = {"Id": "copy-id"}
+        mock_redshift_client.describe_statement.return_value = {
+            "Status": "FINISHED",
+            "Duration": 2000000
+        }
+        
+        # Execute function
+        copy_s3_to_redshift(
+            s3_uri="s3://test-bucket/data/file.csv",
+            table_name="test_table",
+            schema="test_schema",
+            db="test_db",
+            cluster_id="test-cluster",
+            db_user="test-user",
+            role="arn:aws:iam::123456789012:role/test-role",
+            file_format="csv",
+            verbose=0
+        )
+        
+        # Verify COPY command
+        sql = mock_redshift_client.execute_statement.call_args[1]['Sql']
+        assert "COPY test_schema.test_table" in sql
+        assert "FROM 's3://test-bucket/data/file.csv'" in sql
+        assert "FORMAT AS CSV" in sql
+        assert "DELIMITER ','" in sql
+        assert "IGNOREHEADER 1" in sql
+    
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_copy_from_s3_parquet(self, mock_get_session, mock_boto_session):
+        """Test copying Parquet file from S3"""
+        # Mock setup
+        mock_redshift_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.return_value = mock_redshift_client
+        mock_boto_session.return_value = mock_session_instance
+        
+        mock_redshift_client.execute_statement.return_value = {"Id": "copy-id"}
+        mock_redshift_client.describe_statement.return_value = {
+            "Status": "FINISHED",
+            "Duration": 1500000
+        }
+        
+        # Execute with parquet format
+        copy_s3_to_redshift(
+            s3_uri="s3://test-bucket/data/file.parquet",
+            table_name="test_table",
+            schema="test_schema",
+            db="db",
+            cluster_id="cluster",
+            db_user="user",
+            role="role",
+            file_format="parquet",
+            verbose=0
+        )
+        
         # Verify COPY command for parquet
         sql = mock_redshift_client.execute_statement.call_args[1]['Sql']
         assert "FORMAT AS PARQUET" in sql
         assert "DELIMITER" not in sql  # No delimiter for parquet
         assert "IGNOREHEADER" not in sql  # No header option for parquet
 
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_copy_from_s3_with_hooks_is_one_transaction(self, mock_get_session, mock_boto_session):
+        """Test that pre/post hooks, TRUNCATE and COPY are sent as one batch"""
+        mock_redshift_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.return_value = mock_redshift_client
+        mock_boto_session.return_value = mock_session_instance
+
+        mock_redshift_client.batch_execute_statement.return_value = {"Id": "batch-id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 1000}
+
+        copy_s3_to_redshift(
+            s3_uri="s3://test-bucket/data/file.parquet",
+            table_name="test_table",
+            schema="test_schema",
+            db="db",
+            cluster_id="cluster",
+            db_user="user",
+            role="role",
+            file_format="parquet",
+            if_exists="truncate",
+            pre_sql="LOCK test_schema.test_table;",
+            post_sql=["ANALYZE test_schema.test_table;", "GRANT SELECT ON test_schema.test_table TO reader;"],
+            atomic=False,
+            verbose=0
+        )
+
+        mock_redshift_client.execute_statement.assert_not_called()
+        sqls = mock_redshift_client.batch_execute_statement.call_args[1]['Sqls']
+        assert sqls[0] == "LOCK test_schema.test_table;"
+        assert sqls[1] == "TRUNCATE TABLE test_schema.test_table;"
+        assert "COPY test_schema.test_table" in sqls[2]
+        assert sqls[3:] == ["ANALYZE test_schema.test_table;", "GRANT SELECT ON test_schema.test_table TO reader;"]
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_copy_from_s3_with_copy_options(self, mock_get_session, mock_boto_session):
+        """Test CopyOptions end up in the COPY statement"""
+        mock_redshift_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.return_value = mock_redshift_client
+        mock_boto_session.return_value = mock_session_instance
+
+        mock_redshift_client.execute_statement.return_value = {"Id": "copy-id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 1000}
+
+        copy_s3_to_redshift(
+            s3_uri="s3://test-bucket/data/file.csv",
+            table_name="test_table",
+            schema="test_schema",
+            db="db",
+            cluster_id="cluster",
+            db_user="user",
+            role="role",
+            copy_options=CopyOptions(max_error=3, columns=["id", "name"]),
+            verbose=0
+        )
+
+        sql = mock_redshift_client.execute_statement.call_args[1]['Sql']
+        assert 'COPY test_schema.test_table ("id", "name")' in sql
+        assert "COMPUPDATE OFF" in sql
+        assert "STATUPDATE OFF" in sql
+        assert "MAXERROR 3" in sql
+
+    @pytest.mark.parametrize("upsert_method", ["merge", "delete_insert"])
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_copy_from_s3_upsert(self, mock_get_session, mock_boto_session, upsert_method):
+        """Test upsert stages into a temp table and merges it on the key columns"""
+        mock_redshift_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.return_value = mock_redshift_client
+        mock_boto_session.return_value = mock_session_instance
+
+        mock_redshift_client.batch_execute_statement.return_value = {"Id": "batch-id"}
+        mock_redshift_client.describe_statement.return_value = {"Status": "FINISHED", "Duration": 1000}
+
+        copy_s3_to_redshift(
+            s3_uri="s3://test-bucket/data/file.parquet",
+            table_name="test_table",
+            schema="test_schema",
+            db="db",
+            cluster_id="cluster",
+            db_user="user",
+            role="role",
+            file_format="parquet",
+            if_exists="upsert",
+            upsert_keys=["id", "day"],
+            upsert_method=upsert_method,
+            verbose=0
+        )
+
+        sqls = mock_redshift_client.batch_execute_statement.call_args[1]['Sqls']
+        stage = sqls[0].split()[3]
+        assert stage.startswith("test_table__stage_")
+        assert sqls[0] == f"CREATE TEMP TABLE {stage} (LIKE test_schema.test_table);"
+        assert f"COPY {stage}" in sqls[1]
+        match = (f'test_schema.test_table."id" = {stage}."id" AND '
+                 f'test_schema.test_table."day" = {stage}."day"')
+        if upsert_method == "merge":
+            assert sqls[2] == f"MERGE INTO test_schema.test_table USING {stage} ON {match} REMOVE DUPLICATES;"
+        else:
+            assert sqls[2] == f"DELETE FROM test_schema.test_table USING {stage} WHERE {match};"
+            assert sqls[3] == f"INSERT INTO test_schema.test_table SELECT * FROM {stage};"
+        assert sqls[-1] == f"DROP TABLE {stage};"
+
+    def test_upsert_without_keys_raises_error(self):
+        """Test that upsert needs key columns before anything is uploaded"""
+        df = pl.DataFrame({"id": [1]})
+
+        with pytest.raises(ValueError, match="upsert_keys are required"):
+            copy_to_redshift(
+                df=df,
+                table_name="test_table",
+                schema="test_schema",
+                s3_bucket="test-bucket",
+                db="db",
+                cluster_id="cluster",
+                db_user="user",
+                role="role",
+                if_exists="upsert",
+                verbose=0
+            )
+
+
+class TestRedshiftClient:
+    """Test cases for the reusable RedshiftClient"""
+
+    @patch('redshift_utils.boto3.Session')
+    @patch('redshift_utils.s.get_session')
+    def test_clients_are_built_once(self, mock_get_session, mock_boto_session):
+        """Test that sessions, clients and waiters are reused across calls"""
+        mock_redshift_client = Mock()
+        mock_session_instance = Mock()
+        mock_session_instance.client.return_value = mock_redshift_client
+        mock_boto_session.return_value = mock_session_instance
+
+        mock_redshift_client.execute_statement.return_value = {"Id": "copy-id"}
+        mock_redshift_client.describe_statement.return_value = {
+            "Status": "FINISHED",
+            "Duration": 1000000
+        }
+
+        client = RedshiftClient(region_name="us-east-1", max_pool_connections=8)
+        for _ in range(3):
+            client.copy_s3(
+                s3_uri="s3://bucket/file.parquet",
+                table_name="test_table",
+                schema="test_schema",
+                db="db",
+                cluster_id="cluster",
+                db_user="user",
+                role="role",
+                file_format="parquet",
+                verbose=0
+            )
+
+        assert mock_boto_session.call_count == 1
+        assert mock_session_instance.client.call_count == 1
+        mock_session_instance.get_credentials.assert_called_once()
+        config = mock_session_instance.client.call_args[1]['config']
+        assert config.max_pool_connections == 8
+        assert mock_redshift_client.execute_statement.call_count == 3
+
+    def test_module_functions_use_default_client(self):
+        """Test that module-level functions delegate to the shared default client"""
+        client = Mock(spec=RedshiftClient)
+        redshift_utils.set_default_client(client)
+
+        copy_s3_to_redshift("s3://bucket/file.csv", "t", "s", "db", "cluster", "user", "role", verbose=0)
+
+        client.copy_s3.assert_called_once_with(
+            "s3://bucket/file.csv", "t", "s", "db", "cluster", "user", "role", verbose=0
+        )
+        assert redshift_utils.get_default_client() is client
+
+
+class TestStatementPolling:
+    """Test cases for the adaptive DescribeStatement polling"""
+
+    @patch('redshift_utils.time.sleep')
+    def test_short_statement_polls_sub_second(self, mock_sleep):
+        """Test that a fast statement is picked up with sub-second, growing delays"""
+        client = mock_client(describe=[
+            {"Status": "SUBMITTED"},
+            {"Status": "PICKED"},
+            {"Status": "STARTED"},
+            {"Status": "FINISHED", "Duration": 200000000},
+        ], poll_initial_delay=0.2, poll_max_delay=0.5)
+
+        wait = client.wait_for_statement("stmt-1", max_wait_minutes=1)
+
+        assert wait.status == "FINISHED"
+        assert wait.polls == 4
+        assert wait.execution_seconds == pytest.approx(0.2)
+        assert wait.queue_wait_seconds >= 0
+        delays = [c[0][0] for c in mock_sleep.call_args_list]
+        assert delays[0] == pytest.approx(0.2)
+        assert all(d <= 0.5 for d in delays)
+
+    @patch('redshift_utils.time.sleep')
+    def test_deadline_raises_waiter_error(self, mock_sleep):
+        """Test that max_wait_minutes is enforced as a deadline"""
+        client = mock_client(describe=lambda Id: {"Status": "STARTED"})
+
+        with patch('redshift_utils.time.monotonic', side_effect=[0.0, 0.0, 30.0, 61.0]):
+            with pytest.raises(redshift_utils.WaiterError, match="Max wait time"):
+                client.wait_for_statement("stmt-1", max_wait_minutes=1)
+
+        # Never sleeps past the deadline
+        assert mock_sleep.call_args_list[-1][0][0] <= 30.0
+
+    @pytest.mark.parametrize("cancel_abandoned", [True, False])
+    @patch('redshift_utils.time.sleep')
+    def test_deadline_cancels_statement(self, mock_sleep, cancel_abandoned):
+        """Test that a statement still running at its deadline is cancelled on the cluster"""
+        client = mock_client(describe=lambda Id: {"Status": "STARTED"}, cancel_abandoned=cancel_abandoned)
+        client._redshift_data.cancel_statement.return_value = {"Status": True}
+
+        with patch('redshift_utils.time.monotonic', side_effect=[0.0, 0.0, 61.0]):
+            with pytest.raises(redshift_utils.WaiterError):
+                client.wait_for_statement("stmt-1", max_wait_minutes=1)
+
+        if cancel_abandoned:
+            client._redshift_data.cancel_statement.assert_called_once_with(Id="stmt-1")
+        else:
+            client._redshift_data.cancel_statement.assert_not_called()
+
+    @patch('redshift_utils.time.sleep')
+    def test_failed_statement_raises_waiter_error(self, mock_sleep):
+        """Test that FAILED statements surface the last DescribeStatement response"""
+        client = mock_client(describe=[
+            {"Status": "STARTED"},
+            {"Status": "FAILED", "Error": "boom"},
+        ])
+
+        with pytest.raises(redshift_utils.WaiterError) as excinfo:
+            client.wait_for_statement("stmt-1", max_wait_minutes=1)
+
+        assert excinfo.value.last_response["Error"] == "boom"
+
+
+class TestSubmitAndPoll:
+    """Test cases for non-blocking submits and the multi-statement poller"""
+
+    @patch('redshift_utils.time.sleep')
+    def test_submit_unload_returns_without_polling(self, mock_sleep):
+        """Test that submit_unload only calls execute_statement"""
+        client = mock_client("unload-1")
+
+        handle = client.submit_unload(
+            query="SELECT 1", destination="s3://bucket/out/",
+            db="db", cluster_id="cluster", db_user="user", role="role", verbose=0
+        )
+
+        assert handle.statement_id == "unload-1"
+        assert handle.kind == "UNLOAD"
+        assert not handle.done()
+        client._redshift_data.describe_statement.assert_not_called()
+
+    @patch('redshift_utils.time.sleep')
+    def test_as_completed_yields_in_completion_order(self, mock_sleep):
+        """Test that one loop drives many statements and yields the fastest first"""
+        client = mock_client([{"Id": "slow"}, {"Id": "fast"}])
+        remaining_polls = {"slow": 3, "fast": 1}
+
+        def describe(Id):
+            remaining_polls[Id] -= 1
+            if remaining_polls[Id] > 0:
+                return {"Status": "STARTED"}
+            return {"Status": "FINISHED", "Duration": 1000}
+
+        client._redshift_data.describe_statement.side_effect = describe
+
+        handles = [
+            client.submit_copy_s3("s3://b/slow.parquet", "t1", "s", "db", "cluster", "user", "role",
+                                  file_format="parquet", verbose=0),
+            client.submit_copy_s3("s3://b/fast.parquet", "t2", "s", "db", "cluster", "user", "role",
+                                  file_format="parquet", verbose=0),
+        ]
+
+        order = [handle.statement_id for handle in redshift_utils.as_completed(handles)]
+
+        assert order == ["fast", "slow"]
+        assert all(handle.result().status == "FINISHED" for handle in handles)
+        # Rounds, not statements, drive the sleeps
+        assert mock_sleep.call_count == 2
+
+    @patch('redshift_utils.time.sleep')
+    def test_wait_statements_first_exception(self, mock_sleep):
+        """Test that FIRST_EXCEPTION returns as soon as one statement fails"""
+        client = mock_client([{"Id": "ok"}, {"Id": "bad"}])
+        client._redshift_data.describe_statement.side_effect = lambda Id: (
+            {"Status": "FAILED", "Error": "boom"} if Id == "bad" else {"Status": "STARTED"}
+        )
+
+        handles = [
+            client.submit_unload("SELECT 1", f"s3://bucket/{i}/", "db", "cluster", "user", "role", verbose=0)
+            for i in range(2)
+        ]
+        done, not_done = redshift_utils.wait_statements(handles, return_when="FIRST_EXCEPTION")
+
+        assert [h.statement_id for h in done] == ["bad"]
+        assert [h.statement_id for h in not_done] == ["ok"]
+        with pytest.raises(redshift_utils.WaiterError):
+            done[0].result()
+
+    @patch('redshift_utils.time.sleep')
+    def test_submit_copy_cleans_up_when_done(self, mock_sleep):
+        """Test that the staged file is deleted once the COPY handle completes"""
+        client = mock_client("copy-id", {"Status": "FINISHED", "Duration": 1000})
+        df = pl.DataFrame({"col1": [1, 2, 3]})
+
+        handle = client.submit_copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", verbose=0)
+
+        client._s3.upload_file.assert_called_once()
+        client._s3.delete_object.assert_not_called()
+        handle.result()
+        client._s3.delete_object.assert_called_once()
+
+    def test_cancel_finishes_handle_and_cleans_up_once(self):
+        """Test that cancelling a COPY handle ends it and deletes the staged file exactly once"""
+        client = mock_client("copy-id")
+        client._redshift_data.cancel_statement.return_value = {"Status": True}
+        df = pl.DataFrame({"col1": [1, 2, 3]})
+        handle = client.submit_copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", verbose=0)
+
+        assert handle.cancel() is True
+        assert handle.cancel() is False
+
+        assert handle.done() and handle.cancelled
+        client._s3.delete_object.assert_called_once()
+        client._redshift_data.cancel_statement.assert_called_once_with(Id="copy-id")
+        with pytest.raises(redshift_utils.WaiterError, match="was cancelled"):
+            handle.result()
+
+    @patch('redshift_utils.time.sleep', side_effect=KeyboardInterrupt)
+    def test_keyboard_interrupt_cancels_pending(self, mock_sleep):
+        """Test that interrupting a wait cancels the statements still running"""
+        client = mock_client([{"Id": "a"}, {"Id": "b"}], {"Status": "STARTED"})
+        client._redshift_data.cancel_statement.return_value = {"Status": True}
+        handles = [
+            client.submit_unload("SELECT 1", f"s3://bucket/{i}/", "db", "cluster", "user", "role", verbose=0)
+            for i in range(2)
+        ]
+
+        with pytest.raises(KeyboardInterrupt):
+            redshift_utils.wait_statements(handles)
+
+        assert [c[1]["Id"] for c in client._redshift_data.cancel_statement.call_args_list] == ["a", "b"]
+        assert all(handle.cancelled for handle in handles)
+
+    @patch('redshift_utils.time.sleep', side_effect=KeyboardInterrupt)
+    def test_keyboard_interrupt_deletes_staged_copy_files(self, mock_sleep):
+        """Test that interrupting the wait for a COPY cancels it and deletes its staged file"""
+        client = mock_client("copy-id", {"Status": "STARTED"})
+        client._redshift_data.cancel_statement.return_value = {"Status": True}
+        handle = client.submit_copy(pl.DataFrame({"col1": [1, 2, 3]}), "t", "s", "bucket", "db", "cluster",
+                                    "user", "role", verbose=0)
+
+        with pytest.raises(KeyboardInterrupt):
+            handle.result()
+
+        assert handle.done() and handle.cancelled
+        client._s3.delete_object.assert_called_once()
+        assert client._s3.delete_object.call_args[1]["Key"].startswith("temp_loads/t_")
+
+    @patch('redshift_utils.time.sleep')
+    def test_unload_timeout_cancels_and_raises(self, mock_sleep):
+        """Test that an UNLOAD past its deadline is cancelled and raises instead of moving on"""
+        client = mock_client("unload-1", {"Status": "STARTED"})
+        client._redshift_data.cancel_statement.return_value = {"Status": True}
+
+        with patch('redshift_utils.time.monotonic', side_effect=itertools.count(0, 10)):
+            with pytest.raises(TimeoutError, match="unload-1 was cancelled"):
+                client.unload("SELECT 1", "s3://bucket/out/", "db", "cluster", "user", "role",
+                              max_wait_minutes=1, verbose=0)
+
+        client._redshift_data.cancel_statement.assert_called_once_with(Id="unload-1")
+        client._s3.get_paginator.assert_not_called()
+
+    def test_deadline_covers_staging(self):
+        """Test that a COPY is not submitted once staging has used up the deadline"""
+        client = mock_client()
+        df = pl.DataFrame({"col1": [1, 2, 3]})
+
+        with pytest.raises(TimeoutError, match="COPY was not submitted"):
+            client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role",
+                        max_wait_minutes=0, verbose=0)
+
+        client._redshift_data.execute_statement.assert_not_called()
+        client._s3.delete_object.assert_called_once()
+
+
+class TestOperationResult:
+    """Test cases for the result objects returned by UNLOAD and COPY"""
+
+    @patch('redshift_utils.time.sleep')
+    def test_copy_result_has_phases_and_rows(self, mock_sleep):
+        """Test that copy reports staging, statement timings and the COPY's row count"""
+        client = mock_client("copy-id")
+        client._redshift_data.describe_statement.return_value = {
+            "Status": "FINISHED", "Duration": 1000,
+            "SubStatements": [
+                {"Id": "copy-id:1", "QueryString": "DELETE FROM s.t;", "ResultRows": 10},
+                {"Id": "copy-id:2", "QueryString": "\n            COPY s.t FROM 's3://b/k'", "ResultRows": 3},
+            ],
+        }
+        df = pl.DataFrame({"col1": [1, 2, 3]})
+
+        result = client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role",
+                             if_exists="truncate", verbose=0)
+
+        assert result.kind == "COPY"
+        assert result.statement_id == "copy-id"
+        assert result.sub_statement_ids == ["copy-id:1", "copy-id:2"]
+        assert result.status == "FINISHED"
+        assert result.rows == 3
+        assert result.s3_objects == 1
+        assert result.bytes_staged > 0
+        assert {"serialize", "upload", "stage", "submit", "queue_wait", "execute"} <= set(result.timings)
+        assert result.total_seconds >= result.timings["execute"]
+
+        # Results can be exported, copied and sent between processes
+        exported = json.loads(json.dumps(dataclasses.asdict(result)))
+        assert exported["statement_id"] == "copy-id"
+        assert exported["timings"] == result.timings
+        assert copy.deepcopy(result) == result
+        assert pickle.loads(pickle.dumps(result)) == result
+
+    @patch('redshift_utils.time.sleep')
+    def test_unload_result_has_verification(self, mock_sleep):
+        """Test that unload reports rows unloaded and the files it verified"""
+        client = mock_client("unload-id")
+        client._redshift_data.describe_statement.return_value = {
+            "Status": "FINISHED", "Duration": 1000, "ResultRows": 42,
+        }
+        client._s3.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "out/0000_part_00", "Size": 100}, {"Key": "out/0001_part_00", "Size": 50}]},
+        ]
+
+        result = client.unload("SELECT 1", "s3://bucket/out/", "db", "cluster", "user", "role", verbose=0)
+
+        assert result.kind == "UNLOAD"
+        assert result.statement_id == "unload-id"
+        assert result.rows == 42
+        assert result.s3_objects == 2
+        assert result.verification.total_bytes == 150
+        assert {"submit", "queue_wait", "execute", "verify"} <= set(result.timings)
+
+
+class TestLoadStats:
+    """Test cases for post-load statistics from the load system tables"""
+
+    COLUMNS = [{"name": name, "typeName": type_name} for name, type_name in
+               [("slice", "int4"), ("lines", "int8"), ("bytes", "int8"), ("transfer_us", "int8"), ("files", "int4")]]
+
+    def _client(self, records):
+        client = mock_client([{"Id": "copy-id"}, {"Id": "stats-id"}],
+                             {"Status": "FINISHED", "Duration": 1000, "ResultRows": 700, "RedshiftQueryId": 1234})
+        client._redshift_data.get_statement_result.return_value = {
+            "ColumnMetadata": self.COLUMNS,
+            "Records": [[{"longValue": value} for value in row] for row in records],
+        }
+        return client
+
+    def test_copy_collects_per_slice_stats(self):
+        """Test load_stats=True queries the COPY's query ID and summarizes its slices"""
+        client = self._client([(0, 100, 1000, 2_000_000, 2), (1, 600, 5000, 6_000_000, 2)])
+
+        result = client.copy_s3("s3://b/k.parquet", "t", "s", "db", "cluster", "user", "role",
+                                file_format="parquet", load_stats=True, verbose=0)
+
+        stats_sql = client._redshift_data.execute_statement.call_args_list[1][1]["Sql"]
+        assert "stl_load_commits WHERE query = 1234" in stats_sql
+        assert result.query_id == 1234
+        stats = result.load_stats
+        assert (stats.rows_scanned, stats.bytes_scanned, stats.files, stats.slices) == (700, 6000, 2, 2)
+        assert stats.slice_rows == {0: 100, 1: 600}
+        assert stats.slice_seconds == {0: 2.0, 1: 6.0}
+        assert stats.skew == pytest.approx(600 * 2 / 700)
+
+    def test_missing_load_records_do_not_fail_the_copy(self):
+        """Test a COPY still succeeds when the system tables have no rows for it yet"""
+        client = self._client([])
+
+        result = client.copy_s3("s3://b/k.parquet", "t", "s", "db", "cluster", "user", "role",
+                                file_format="parquet", load_stats=True, verbose=0)
+
+        assert result.status == "FINISHED"
+        assert result.load_stats is None
+
+
+class RecordingInstrumentation(redshift_utils.Instrumentation):
+    """Instrumentation that keeps every finished step"""
+
+    def __init__(self):
+        self.events = []
+
+    def end(self, step, context, seconds, attributes, error=None):
+        self.events.append((step, dict(attributes), error))
+
+
+class TestInstrumentation:
+    """Test cases for the instrumentation hooks and their adapters"""
+
+    POLLS = [{"Status": "STARTED"}, {"Status": "FINISHED", "Duration": 1000}]
+
+    @patch('redshift_utils.time.sleep')
+    def test_copy_reports_every_step(self, mock_sleep):
+        """Test that a COPY reports serialize, upload, submit and each poll with byte counts"""
+        recorder = RecordingInstrumentation()
+        client = mock_client("copy-id", self.POLLS, instrumentation=recorder)
+        df = pl.DataFrame({"col1": [1, 2, 3]})
+
+        client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", verbose=0)
+
+        steps = [step for step, _, _ in recorder.events]
+        assert steps == ["serialize", "upload_file", "execute_statement", "describe_statement", "describe_statement"]
+        serialize, upload = recorder.events[0][1], recorder.events[1][1]
+        assert serialize["rows"] == 3
+        assert serialize["bytes"] == upload["bytes"] > 0
+        assert recorder.events[2][1]["statement_id"] == "copy-id"
+        assert [e[1]["status"] for e in recorder.events[3:]] == ["STARTED", "FINISHED"]
+
+    @patch('redshift_utils.time.sleep')
+    def test_failed_step_is_reported(self, mock_sleep):
+        """Test that a step raising still ends, carrying the error"""
+        recorder = RecordingInstrumentation()
+        client = mock_client("copy-id", self.POLLS, instrumentation=recorder)
+        client._redshift_data.execute_statement.side_effect = RuntimeError("throttled")
+
+        with pytest.raises(RuntimeError):
+            client.submit_copy_s3("s3://b/k.parquet", "t", "s", "db", "cluster", "user", "role",
+                                  file_format="parquet", verbose=0)
+
+        (step, _, error), = recorder.events
+        assert step == "execute_statement"
+        assert str(error) == "throttled"
+
+    @patch('redshift_utils.time.sleep')
+    def test_opentelemetry_spans(self, mock_sleep):
+        """Test that each step becomes an ended span with prefixed attributes"""
+        tracer = Mock()
+        client = mock_client("copy-id", self.POLLS, instrumentation=redshift_utils.OpenTelemetryInstrumentation(tracer))
+
+        client.copy_s3("s3://b/k.parquet", "t", "s", "db", "cluster", "user", "role",
+                       file_format="parquet", verbose=0)
+
+        names = [c[0][0] for c in tracer.start_span.call_args_list]
+        assert names == ["redshift.execute_statement", "redshift.describe_statement", "redshift.describe_statement"]
+        span = tracer.start_span.return_value
+        assert span.end.call_count == 3
+        assert span.set_attributes.call_args_list[0][0][0]["redshift.statement_id"] == "copy-id"
+
+    @patch('redshift_utils.MIN_ROWS_PER_STAGE_FILE', 2)
+    @patch('redshift_utils.time.sleep')
+    def test_worker_thread_spans_nest_under_caller(self, mock_sleep):
+        """Test that steps run on staging and asyncio worker threads keep the caller's parent span"""
+        trace = pytest.importorskip("opentelemetry.trace")
+        parents = []
+
+        def start_span(name, attributes=None):
+            parents.append((name, trace.get_current_span().get_span_context().span_id))
+            return Mock()
+
+        tracer = Mock()
+        tracer.start_span.side_effect = start_span
+        client = mock_client("copy-id", {"Status": "FINISHED", "Duration": 1000},
+                             instrumentation=redshift_utils.OpenTelemetryInstrumentation(tracer))
+        aio = AsyncRedshiftClient(client)
+        df = pl.DataFrame({"id": range(20)})
+        parent = trace.NonRecordingSpan(trace.SpanContext(trace_id=1, span_id=42, is_remote=False))
+
+        with trace.use_span(parent):
+            client.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", num_slices=4,
+                        stage_format="parquet", verbose=0)
+            uploads = sum(name == "redshift.upload_file" for name, _ in parents)
+            asyncio.run(aio.copy(df, "t", "s", "bucket", "db", "cluster", "user", "role", num_slices=1, verbose=0))
+        aio.close()
+
+        assert uploads == 4
+        assert sum(name == "redshift.upload_file" for name, _ in parents) == 5
+        assert sum(name == "redshift.execute_statement" for name, _ in parents) == 2
+        assert all(span_id == 42 for _, span_id in parents)
+
+    @patch('redshift_utils.time.sleep')
+    def test_logging_adapter(self, mock_sleep, caplog, capsys):
+        """Test that the logging adapter writes one record per step and verbose=0 prints nothing"""
+        client = mock_client("copy-id", self.POLLS, instrumentation=redshift_utils.LoggingInstrumentation())
+
+        with caplog.at_level("INFO", logger="redshift_utils"):
+            client.copy_s3("s3://b/k.parquet", "t", "s", "db", "cluster", "user", "role",
+                           file_format="parquet", verbose=0)
+
+        assert capsys.readouterr().out == ""
+
+        assert [r.redshift_step for r in caplog.records] == [
+            "execute_statement", "describe_statement", "describe_statement",
+        ]
+        assert caplog.records[0].redshift_attributes["kind"] == "COPY"
+
+
+class TestAsyncRedshiftClient:
+    """Test cases for the asyncio API"""
+
+    FAST_POLLS = {"poll_initial_delay": 0.001, "poll_max_delay": 0.005}
+
+    @staticmethod
+    def _statement_id(**kwargs):
+        # Statements are told apart by the first quoted string in their SQL
+        return {"Id": kwargs["Sql"].split("'")[1]}
+
+    def test_concurrent_copies_are_bounded(self):
+        """Test that many async COPYs complete with at most max_concurrency in flight"""
+        polls = {}
+
+        def describe(Id):
+            polls[Id] = polls.get(Id, 0) + 1
+            return {"Status": "FINISHED", "Duration": 1000} if polls[Id] >= 3 else {"Status": "STARTED"}
+
+        client = mock_client(self._statement_id, describe, **self.FAST_POLLS)
+        aio = AsyncRedshiftClient(client, max_concurrency=2)
+        in_flight = {"now": 0, "max": 0}
+        original_wait = aio.wait
+
+        async def tracking_wait(handle):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            try:
+                return await original_wait(handle)
+            finally:
+                in_flight["now"] -= 1
+
+        aio.wait = tracking_wait
+
+        async def main():
+            await asyncio.gather(*[
+                aio.copy_s3(f"s3://bucket/file{i}.parquet", "t", "s", "db", "cluster", "user", "role",
+                            file_format="parquet", verbose=0)
+                for i in range(6)
+            ])
+
+        asyncio.run(main())
+        aio.close()
+
+        assert len(polls) == 6
+        assert all(count == 3 for count in polls.values())
+        assert in_flight["max"] == 2
+
+    def test_cancelled_copy_deletes_staged_files(self):
+        """Test that cancelling an awaiting async COPY cancels the statement and deletes its staged file"""
+        client = mock_client("copy-id", {"Status": "STARTED"}, **self.FAST_POLLS)
+        client._redshift_data.cancel_statement.return_value = {"Status": True}
+        aio = AsyncRedshiftClient(client)
+
+        async def main():
+            task = asyncio.ensure_future(aio.copy(pl.DataFrame({"col1": [1, 2, 3]}), "t", "s", "bucket", "db",
+                                                  "cluster", "user", "role", verbose=0))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.05)
+
+        asyncio.run(main())
+        aio.close()
+
+        client._redshift_data.cancel_statement.assert_called_once_with(Id="copy-id")
+        client._s3.delete_object.assert_called_once()
+
+    def test_read_falls_back_to_unload_when_fetch_is_rejected(self):
+        """Test async auto reads re-run an underestimated result too large to fetch as an UNLOAD"""
+        client = mock_client("query-id", {"Status": "FINISHED", "Duration": 1000}, **self.FAST_POLLS)
+        client._redshift_data.get_statement_result.side_effect = [
+            {"Records": [[{"stringValue": "XN Seq Scan on t  (cost=0.00..0.10 rows=10 width=8)"}]]},
+            redshift_utils.ClientError({"Error": {"Code": "ValidationException",
+                                                  "Message": "Query result exceeds the limit"}},
+                                       "GetStatementResult"),
+        ]
+        buffer = io.BytesIO()
+        pl.DataFrame({"id": [1, 2]}).write_parquet(buffer)
+        client._s3.get_paginator.return_value.paginate.side_effect = lambda Bucket, Prefix: [
+            {"Contents": [{"Key": Prefix + "0000_part_00.parquet", "Size": len(buffer.getvalue())}]}]
+        client._s3.get_object.return_value = {"Body": Mock(read=Mock(return_value=buffer.getvalue()))}
+        aio = AsyncRedshiftClient(client)
+
+        df = asyncio.run(aio.read("SELECT id FROM t", "bucket", "db", "cluster", "user", "role", verbose=0))
+        aio.close()
+
+        assert df["id"].to_list() == [1, 2]
+        sqls = [c[1]["Sql"] for c in client._redshift_data.execute_statement.call_args_list]
+        assert "format as parquet" in sqls[-1]
+
+    def test_cancellation_stops_polling(self):
+        """Test that cancelling an awaiting task stops describe_statement polls"""
+        client = mock_client(self._statement_id, lambda Id: {"Status": "STARTED"}, **self.FAST_POLLS)
+        aio = AsyncRedshiftClient(client)
+
+        async def main():
+            task = asyncio.ensure_future(aio.unload("SELECT 1", "s3://bucket/out/", "db", "cluster",
+                                                    "user", "role", verbose=0))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            polls = client._redshift_data.describe_statement.call_count
+            await asyncio.sleep(0.05)
+            return polls
+
+        polls_at_cancel = asyncio.run(main())
+        aio.close()
+
+        assert polls_at_cancel > 0
+        assert client._redshift_data.describe_statement.call_count == polls_at_cancel
+        client._redshift_data.cancel_statement.assert_called_once_with(Id="SELECT 1")
+
+
+class TestLocalRedshift:
+    """End-to-end round trips through the local Data API and S3 engine"""
+
+    CREDENTIALS = {"db": "dev", "cluster_id": "local", "db_user": "admin", "role": "arn:aws:iam::0:role/local"}
+
+    @pytest.fixture
+    def local(self):
+        local = LocalRedshift(num_slices=4)
+        yield local
+        local.close()
+
+    def _frame(self, n=10):
+        return pl.DataFrame({
+            "id": list(range(n)),
+            "name": [f"user_{i}" if i % 3 else None for i in range(n)],
+            "score": [i / 4 for i in range(n)],
+            "active": [i % 2 == 0 for i in range(n)],
+            "day": [date(2024, 1, 1 + i % 28) for i in range(n)],
+            "seen_at": [datetime(2024, 1, 1, 12, 0, i % 60, 500) for i in range(n)],
+            "country": ["CL" if i % 2 else "AR" for i in range(n)],
+        })
+
+    def test_copy_then_unload_round_trip(self, local):
+        """Test a replace COPY loads the frame and a Parquet UNLOAD writes it back out per slice"""
+        client = local.client()
+        df = self._frame()
+
+        copied = client.copy(df, "events", "analytics", "bucket", if_exists="replace", verbose=0,
+                             **self.CREDENTIALS)
+        unloaded = client.unload("SELECT * FROM analytics.events WHERE name <> ''x''", "s3://bucket/out/",
+                                 file_format="parquet", options=UnloadOptions(manifest_verbose=True),
+                                 verbose=0, **self.CREDENTIALS)
+
+        assert copied.rows == 10 and copied.query_id is not None
+        assert "execute" in copied.timings and "stage" in copied.timings
+        assert local.table("analytics.events").equals(df)
+        assert local.s3.keys("bucket", "temp_loads/") == []
+        keys = local.s3.keys("bucket", "out/")
+        assert keys[-1] == "out/manifest"
+        # 6 rows over 4 slices: 2 per slice, the last slice gets none
+        assert keys[:-1] == [f"out/{slice_:04d}_part_00.parquet" for slice_ in range(3)]
+        assert unloaded.rows == 6 and unloaded.verification.complete
+        frames = [pl.read_parquet(local.s3.get_bytes("bucket", key)) for key in keys[:-1]]
+        assert pl.concat(frames).equals(df.filter(pl.col("name").is_not_null()))
+
+    def test_upsert_and_failed_batch(self, local):
+        """Test upserts replace matching rows and a failing hook rolls the whole load back"""
+        client = local.client()
+        df = self._frame()
+        client.copy(df, "events", "analytics", "bucket", if_exists="replace", verbose=0, **self.CREDENTIALS)
+        changes = df.filter(pl.col("id") >= 8).with_columns(pl.col("score") * 100)
+        changes = pl.concat([changes, df.filter(pl.col("id") == 0).with_columns(pl.lit(10, dtype=pl.Int64).alias("id"))])
+
+        for method in ("merge", "delete_insert"):
+            client.copy(changes, "events", "analytics", "bucket", if_exists="upsert", upsert_keys="id",
+                        upsert_method=method, verbose=0, **self.CREDENTIALS)
+            table = local.table("analytics.events").sort("id")
+            assert table["id"].to_list() == list(range(11))
+            assert table.filter(pl.col("id") == 9)["score"][0] == 225.0
+
+        with pytest.raises(Exception, match="COPY failed"):
+            client.copy(df, "events", "analytics", "bucket", if_exists="truncate", post_sql="SELECT * FROM nowhere",
+                        verbose=0, **self.CREDENTIALS)
+        assert local.table("analytics.events").height == 11
+
+    def test_fetch_and_read_decode_every_type(self, local):
+        """Test Data API paging and UNLOAD reads return the table with its types"""
+        local.create_table("analytics.events", self._frame(25))
+        local.redshift_data.page_size = 10
+        client = local.client()
+
+        fetched = client.fetch("SELECT * FROM analytics.events ORDER BY id", verbose=0, db="dev",
+                               cluster_id="local", db_user="admin")
+        read = client.read("SELECT * FROM analytics.events", "bucket", method="unload", verbose=0,
+                           **self.CREDENTIALS)
+
+        expected = self._frame(25).with_columns(pl.col("id").cast(pl.Int64))
+        assert fetched.equals(expected)
+        assert read.sort("id").equals(self._frame(25))
+        assert local.s3.keys("bucket") == []
+
+    def test_partitioned_gzip_csv_unload_and_copy_s3(self, local):
+        """Test partitioned CSV UNLOADs write key=value prefixes that COPY reads back"""
+        client = local.client()
+        local.create_table("analytics.events", self._frame())
+
+        client.unload("SELECT id, name, country FROM analytics.events", "s3://bucket/csv/",
+                      options=UnloadOptions(compression="gzip", partition_by="country", manifest=True),
+                      verbose=0, **self.CREDENTIALS)
+        keys = local.s3.keys("bucket", "csv/")
+        assert "csv/country=AR/0000_part_00.csv.gz" in keys and "csv/manifest" in keys
+        lines = gzip.decompress(local.s3.get_bytes("bucket", "csv/country=CL/0000_part_00.csv.gz")).decode()
+        assert lines.splitlines()[0] == "id,name"
+
+        client.unload("SELECT id, name, country FROM analytics.events", "s3://bucket/plain/",
+                      partition_by="country", verbose=0, **self.CREDENTIALS)
+        local.create_table("analytics.chile", pl.DataFrame(schema={"id": pl.Int64, "name": pl.Utf8}))
+        result = client.copy_s3("s3://bucket/plain/country=CL/", "chile", "analytics", file_format="csv",
+                                load_stats=True, verbose=0, **self.CREDENTIALS)
+
+        assert result.rows == 5
+        assert local.table("analytics.chile").sort("id")["id"].to_list() == [1, 3, 5, 7, 9]
+        # 5 rows in 3 files of 2, 2 and 1 rows, each behind a header line
+        assert result.load_stats.files == 3 and result.load_stats.rows_scanned == 8
+
+    def test_unload_into_non_empty_prefix_needs_allowoverwrite(self, local):
+        """Test UNLOAD fails like Redshift when the destination has files and ALLOWOVERWRITE is off"""
+        client = local.client()
+        local.create_table("analytics.events", self._frame())
+        local.s3.put_object(Bucket="bucket", Key="out/old.csv", Body=b"x")
+
+        with pytest.raises(Exception, match="UNLOAD failed"):
+            client.unload("SELECT * FROM analytics.events", "s3://bucket/out/", allow_overwrite=False,
+                          verbose=0, **self.CREDENTIALS)
+        client.unload("SELECT * FROM analytics.events", "s3://bucket/out/", options=UnloadOptions(cleanpath=True),
+                      verbose=0, **self.CREDENTIALS)
+
+        assert "out/old.csv" not in local.s3.keys("bucket", "out/")
+
+    def test_client_through_package_import(self, monkeypatch):
+        """Test the local engine builds its client when imported through the package"""
+        root = os.path.dirname(os.path.abspath(__file__))
+        spec = importlib.util.spec_from_file_location("local_package", os.path.join(root, "__init__.py"),
+                                                      submodule_search_locations=[root])
+        package = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, "local_package", package)
+        spec.loader.exec_module(package)
+
+        local = package.LocalRedshift()
+        client = local.client()
+        local.close()
+
+        assert isinstance(client, sys.modules["local_package.redshift_utils"].RedshiftClient)
+        assert client.redshift_data is local.redshift_data
+
+    def test_s3_listing_pages_and_delimiters(self):
+        """Test ListObjectsV2 pagination and common prefixes of the local S3"""
+        s3 = LocalS3(max_keys=2)
+        for key in ["p/a=1/x", "p/a=2/x", "p/b", "p/c", "p/d"]:
+            s3.put_object(Bucket="bucket", Key=key, Body=b"1")
+
+        pages = list(s3.get_paginator("list_objects_v2").paginate(Bucket="bucket", Prefix="p/", Delimiter="/"))
+
+        assert [page["KeyCount"] for page in pages] == [2, 2, 1]
+        assert [p["Prefix"] for page in pages for p in page.get("CommonPrefixes", [])] == ["p/a=1/", "p/a=2/"]
+        assert [o["Key"] for page in pages for o in page.get("Contents", [])] == ["p/b", "p/c", "p/d"]
+        with pytest.raises(redshift_utils.ClientError):
+            s3.get_object(Bucket="bucket", Key="p/missing")
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file